@@ -1,26 +1,227 @@
+import asyncio
+import json
 import math
+import mmap
+import os
+import platform
+import random
+import statistics
+import struct
+import sys
 import time
-from typing import List
+from array import array
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from itertools import groupby, islice
+from typing import AsyncIterator, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Mot de contrôle ("BPIX") qui termine un tableau compressé contenant son index d'accès
+INDEX_MAGIC = 0x42504958
+# Mot de contrôle ("BPZM") qui termine le minimum et le maximum de chaque zone du tableau
+ZONE_MAGIC = 0x42505a4d
+# Bit de poids fort du nombre d'overflow dans les meta : les zones suivent le tableau compressé
+ZONE_MAP_FLAG = 1 << 31
+
+# Fichiers enregistrés avec save() : entête (magic, version, méthode, pas de l'index,
+# nombre de mots, nombre d'entiers et d'overflow échantillonnés dans l'index)
+FILE_MAGIC = b'BPAK'
+FILE_VERSION = 1
+FILE_HEADER = struct.Struct('<4sHHIQII4x')
+FILE_COMPRESS_TYPES = ['crossing', 'nocrossing', 'blocked', 'dictionary', 'wide', 'raw', 'transform']
+
+def _to_little_endian(values: array) -> bytes:
+    if sys.byteorder != 'little':
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+# Lecture de count entiers little-endian dans un fichier projeté en mémoire,
+# sans copie lorsque la machine est elle-même little-endian
+def _mapped_array(buffer: mmap.mmap, offset: int, typecode: str, count: int) -> Sequence[int]:
+    length = count * array(typecode).itemsize
+    if sys.byteorder == 'little':
+        return memoryview(buffer)[offset:(offset + length)].cast(typecode)
+    values = array(typecode)
+    values.frombytes(buffer[offset:(offset + length)])
+    values.byteswap()
+    return values
+
+# Mots de 32 bits d'un tableau compressé sous forme d'entiers Python : un tableau NumPy
+# (uint32) déborderait sinon lors des décalages de bits au décodage
+def _to_words(compressed_array: Iterable[int]) -> List[int]:
+    return array('I', compressed_array).tolist()
+
+# Statistiques d'une liste de mesures en secondes (le p99 est la plus petite
+# mesure supérieure ou égale à 99 % des mesures)
+def timing_stats(samples: Sequence[float]) -> dict[str, float]:
+    if not samples:
+        raise ValueError("no timing sample")
+    ordered = sorted(samples)
+    return {
+        'count': len(ordered),
+        'total': sum(ordered),
+        'min': ordered[0],
+        'median': statistics.median(ordered),
+        'p99': ordered[math.ceil(0.99 * len(ordered)) - 1],
+    }
+
+# Temps total d'un envoi (en secondes) : compression, envoi de size_bytes octets et décompression.
+# Envoyé en chunks trames (send_frames), la compression d'une trame, l'envoi de la précédente et la
+# décompression de celle d'avant se font en même temps : seule l'étape la plus lente est payée
+# pour chaque trame, les deux autres seulement pour la première et la dernière
+def transfer_time(compression: float, size_bytes: float, decompression: float, bandwidth: float,
+                  latency: float, chunks: int = 1) -> float:
+    if chunks <= 0:
+        raise ValueError("chunks must be positive")
+    steps = [compression / chunks, size_bytes / bandwidth / chunks, decompression / chunks]
+    return latency + sum(steps) + ((chunks - 1) * max(steps))
+
+#####
+# Ecriture de bits dans des mots de 32 bits
+# (les bits sont écrits du poids fort vers le poids faible, comme dans la "phrase")
+#####
+class BitWriter:
+    def __init__(self, words_length: int = 32):
+        self.words_length = words_length
+        self.words: List[int] = []
+        # Bits en attente qui ne forment pas encore un mot complet
+        self.pending: int = 0
+        self.pending_length: int = 0
+
+    def __len__(self) -> int:
+        return len(self.words) * self.words_length + self.pending_length
+
+    # Nombre de bits restant dans le mot courant
+    def available(self) -> int:
+        return (self.words_length - self.pending_length) % self.words_length
+
+    def write(self, value: int, length: int) -> None:
+        self.pending = (self.pending << length) | (value & ((1 << length) - 1))
+        self.pending_length += length
+        # On transforme en mots tous les bits en attente qui le permettent
+        while self.pending_length >= self.words_length:
+            self.pending_length -= self.words_length
+            self.words.append(self.pending >> self.pending_length)
+            self.pending &= (1 << self.pending_length) - 1
+
+    # On complète le mot courant avec des "0"
+    def pad(self) -> None:
+        if self.pending_length:
+            self.write(0, self.available())
+
+    def getvalue(self) -> List[int]:
+        self.pad()
+        return self.words
+
+#####
+# Lecture de bits à une position donnée dans des mots de 32 bits
+#####
+class BitReader:
+    def __init__(self, words: Sequence[int], words_length: int = 32):
+        self.words = words
+        self.words_length = words_length
+
+    def __len__(self) -> int:
+        return len(self.words) * self.words_length
+
+    def read(self, position: int, length: int) -> int:
+        index, offset = divmod(position, self.words_length)
+        end = offset + length
+        value: int = 0
+        read_length: int = 0
+        # On assemble les mots nécessaires (tous les tableaux écrits sont complétés par des "0" :
+        # une lecture au-delà du dernier mot est une erreur)
+        if position < 0 or math.ceil((position + length) / self.words_length) > len(self.words):
+            raise IndexError('Unable to read bits')
+        while read_length < end:
+            value = (value << self.words_length) | self.words[index]
+            read_length += self.words_length
+            index += 1
+        return (value >> (read_length - end)) & ((1 << length) - 1)
+
+    # Position du prochain bit à "1" à partir de position (IndexError s'il n'y en a pas)
+    def find_one(self, position: int) -> int:
+        index, offset = divmod(position, self.words_length)
+        if position < 0 or index >= len(self.words):
+            raise IndexError('Unable to find bit')
+        word = self.words[index] & ((1 << (self.words_length - offset)) - 1)
+        while word == 0:
+            index += 1
+            if index >= len(self.words):
+                raise IndexError('Unable to find bit')
+            word = self.words[index]
+        return (index + 1) * self.words_length - word.bit_length()
+
+# Remplacement de length bits à partir de position dans des mots déjà écrits
+def _write_bits(words: List[int], position: int, value: int, length: int, words_length: int = 32) -> None:
+    end = position + length
+    while position < end:
+        index, offset = divmod(position, words_length)
+        count = min(words_length - offset, end - position)
+        shift = words_length - offset - count
+        mask = ((1 << count) - 1) << shift
+        bits = (value >> (end - position - count)) & ((1 << count) - 1)
+        words[index] = (words[index] & ~mask) | (bits << shift)
+        position += count
 
 #####
 # Classe de base implémentant les méthodes partagtées
 # entre les deux méthodes crossing et nocrossing
 #####
 class BaseBitPacker:
+    # Nombre de bits maximum d'un entier et type des tableaux retournés par get_many et slice
+    integer_length = 32
+    typecode = 'I'
+    # Passage automatique à l'encodage par dictionnaire lorsqu'il est plus court
+    auto_dictionary = True
+
     # Initialisation en envoyer le tableau à compresser en paramètre
     def __init__(self, array: List[int] = []):
+        # Cache LRU des blocs décodés (désactivé tant que enable_cache n'est pas appelé) :
+        # nombre de succès, d'échecs et de blocs retirés dans cache_stats
+        self.cache: Optional[OrderedDict[int, array]] = None
+        self.cache_block_size = 128
+        self.cache_max_entries: Optional[int] = None
+        self.cache_max_bytes: Optional[int] = None
+        self.cache_bytes = 0
+        self.cache_stats: dict[str, int] = {'hits': 0, 'misses': 0, 'evictions': 0}
+        self._overflow_table: Optional[array] = None
+        # Minimum et maximum des entiers de chaque zone de zone_size entiers (requêtes)
+        self.zone_size = 128
+        self.zones: List[Tuple[int, int]] = []
+        # Zones écrites après le tableau compressé (ZONE_MAP_FLAG dans les meta)
+        self.zone_map = False
         self.array = array
         self.max = 0
         self.compressed = []
         self.words = []
         self.lengths = []
-        self.meta_words_length = (32).bit_length()
+        self.meta_words_length = self.integer_length.bit_length()
         self.words_length = 32
         self.total_overflow = 0
         self.total_items = 0
         self.best_bit_length = 0
         self.crossing = True
+        # Encodage par dictionnaire : chaque entier est remplacé par sa position
+        # dans la liste triée des entiers distincts
+        self.dictionary = False
         self.benchmark: dict[str, int] = {}
+        # Les timings_size dernières mesures de chaque étape, en secondes (benchmark ne garde que la dernière)
+        self.timings_size = 10000
+        self.timings: dict[str, deque] = {}
+        # Index d'accès (nocrossing) : position du premier bit d'un entier
+        # (et d'un overflow) tous les index_step entiers
+        self.index_step = 128
+        self.index: List[int] = []
+        self.overflow_index: List[int] = []
+        # Fichier projeté en mémoire lorsque le packer est ouvert avec open()
+        self._mmap = None
 
         # Initialisation des valeurs si le tableau n'est pas vide
         if len(array) > 0:
@@ -29,14 +230,6 @@ class BaseBitPacker:
             self._find_best_bit_length()
             self._set_total_items()
 
-    @staticmethod
-    def _int_to_bits(number: int, length: int):
-        return bin(number)[2:].zfill(length)
-
-    @staticmethod
-    def _bits_to_int(bits: str) -> int:
-        return int(bits, 2)
-
     def _set_array_max_bit_length(self):
         if not self.lengths:
             self._set_array_bit_lengths()
@@ -50,67 +243,108 @@ class BaseBitPacker:
     def _set_total_items(self):
         self.total_items = len(self.array)
 
+    # Histogramme du nombre d'entiers distincts pour chaque nombre de bits
+    # (seuls les overflows uniques sont écrits à la fin du tableau compressé)
+    def _bit_length_histogram(self) -> List[int]:
+        distinct_counts: List[int] = [0] * (self.max + 1)
+        for number in set(self.array):
+            distinct_counts[number.bit_length()] += 1
+        return distinct_counts
+
+    # Nombre total de bits du tableau compressé pour un nombre de bits donné
+    # (méta, entiers ou positions précédés du bit d'overflow, puis overflows uniques),
+    # None si ce nombre de bits ne permet pas d'écrire le tableau
+    def _compressed_bit_length(self, bit_length: int, total_items: int, total_overflow: int) -> Optional[int]:
+        meta_length = self._meta_length()
+        return meta_length + (total_items * (bit_length + 1)) + (total_overflow * self.max)
+
+    # Nombre de bits des meta (nombre d'entiers et d'overflow sur 32 bits,
+    # nombre de bits idéal et maximum sur meta_words_length bits)
+    def _meta_length(self) -> int:
+        return 64 + (self.meta_words_length * 2)
+
     # Calcul du meilleur bit pour compresser
     def _find_best_bit_length(self):
         start = time.perf_counter()
         best_bit_length: int = 1
         number_of_words: int = 0
+        distinct_counts = self._bit_length_histogram()
+        total_items = len(self.lengths)
+        # Nombre d'overflow (uniques) pour le nombre de bits en cours :
+        # on retire au fur et à mesure les entiers qui tiennent sur nb bits
+        total_overflow: int = sum(distinct_counts) - distinct_counts[0]
         # Le meilleur nombre se trouve entre 1 et le nombre maximum
         # de bits utilisés pour écrire les overflow
-        for nb in range(1, self.max):
-            nb_length: int = 0
-            # On calcul le nombre total d'overflow qu'il y aura pour ce nombre
-            # si les nombres total d'overflow est supérieur au nombre en question
-            # on continue la boucle car on ne pourra pas écrire la position de l'overflow
-            total_overflow = len([n for n in [number.bit_length() for number in self.array] if n > nb])
-            if total_overflow.bit_length() > nb:
+        for nb in range(1, self.max + 1):
+            total_overflow -= distinct_counts[nb]
+            # Si la position du dernier overflow ne peut pas s'écrire sur nb bits
+            # on continue la boucle
+            if total_overflow > (1 << nb):
                 continue
 
-            # On calcul le nombre total de bits qui seront utilisés pour écrire
-            # tous les nombres du tableau
-            for number in self.array:
-                length = number.bit_length()
-                if length > nb:
-                    nb_length += nb + 1 + self.max
-                else:
-                    nb_length += nb + 1
-
-            # On sélectionne le nombre de bit le plus bas qui est apparu
+            nb_length = self._compressed_bit_length(nb, total_items, total_overflow)
+            if nb_length is None:
+                continue
+            # A nombre de mots égal, on garde le plus grand nombre de bits (moins d'overflow)
             if number_of_words == 0 or math.ceil(nb_length / 32) <= number_of_words:
                 best_bit_length = nb
                 number_of_words = math.ceil(nb_length / 32)
 
+        # Avec peu d'entiers distincts, l'encodage par dictionnaire évite le bit d'overflow
+        total_distinct = sum(distinct_counts)
+        meta_length = self._meta_length()
+        dictionary_length = (meta_length + (total_items * self._dictionary_bit_length(total_distinct)) +
+                             (total_distinct * self.max))
+        self.dictionary = self.auto_dictionary and math.ceil(dictionary_length / 32) < number_of_words
+        if self.dictionary:
+            best_bit_length = self._dictionary_bit_length(total_distinct)
+
         self.best_bit_length = best_bit_length
         end = time.perf_counter()
-        self._add_timer('find_best_bit_length', f"{end - start:.6f}")
+        self._add_timer('find_best_bit_length', end - start)
 
     # Lecture des meta (nombre total d'entier, maximum de bits
     # nombre total d'overflow)
-    def _read_meta(self, phrase: str) -> int:
+    def _read_meta(self, reader: BitReader) -> int:
         start = time.perf_counter()
         cursor: int = 0
-        self.total_items = self._bits_to_int(phrase[cursor:32])
+        self.total_items = reader.read(cursor, 32)
         cursor += 32
-        self.best_bit_length = self._bits_to_int(phrase[cursor:(cursor + self.meta_words_length)])
+        self.best_bit_length = reader.read(cursor, self.meta_words_length)
         cursor += self.meta_words_length
-        self.max = self._bits_to_int(phrase[cursor:(cursor + self.meta_words_length)])
+        self.max = reader.read(cursor, self.meta_words_length)
         cursor += self.meta_words_length
-        self.total_overflow = self._bits_to_int(phrase[cursor:(cursor + 32)])
-        cursor += 32
+        cursor = self._read_total_overflow(reader, cursor)
+        # Un nombre de bits idéal à 0 indique un encodage par dictionnaire
+        # (le nombre d'overflow est alors le nombre d'entiers distincts)
+        self.dictionary = self.best_bit_length == 0
+        if self.dictionary:
+            self.best_bit_length = self._dictionary_bit_length(self.total_overflow)
         end = time.perf_counter()
-        self._add_timer('read_meta', f"{end - start:.6f}")
+        self._add_timer('read_meta', end - start)
         return cursor
 
+    # Nombre d'overflow sur 32 bits, dont le bit de poids fort (ZONE_MAP_FLAG)
+    # indique que les zones sont écrites après le tableau compressé
+    def _read_total_overflow(self, reader: BitReader, cursor: int) -> int:
+        total_overflow = reader.read(cursor, 32)
+        self.zone_map = bool(total_overflow & ZONE_MAP_FLAG)
+        self.total_overflow = total_overflow & ~ZONE_MAP_FLAG
+        return cursor + 32
+
+    def _write_total_overflow(self, writer: BitWriter, zone_map: bool) -> None:
+        if self.total_overflow >= ZONE_MAP_FLAG:
+            raise ValueError("Too many overflows")
+        writer.write(self.total_overflow | (ZONE_MAP_FLAG if zone_map else 0), 32)
+
     # Ecriture des meta
-    def _write_meta(self) -> str:
+    def _write_meta(self, writer: BitWriter) -> None:
         start = time.perf_counter()
-        phrase: str = ''
-        phrase += self._int_to_bits(self.total_items, 32)
-        phrase += self._int_to_bits(self.best_bit_length, self.meta_words_length)
-        phrase += self._int_to_bits(self.max, self.meta_words_length)
+        writer.write(self.total_items, 32)
+        writer.write(0 if self.dictionary else self.best_bit_length, self.meta_words_length)
+        writer.write(self.max, self.meta_words_length)
         end = time.perf_counter()
-        self._add_timer('writing_meta', f"{end - start:.6f}")
-        return phrase
+        self._add_timer('writing_meta', end - start)
 
     # Liste des overflows uniques (on ne rajoute pas un nombre
     # déjà listé deux fois à la fin de la chaine)
@@ -121,26 +355,416 @@ class BaseBitPacker:
         # On parcourt chaque entier de la liste ; s'il est plus grand que le best_bit_length, 
         # on l'ajoute à la liste des overflows
         for number in self.array:
+            if number < 0:
+                raise ValueError("Integer is negative")
             bit_length = number.bit_length()
-            if bit_length > 32:
-                raise ValueError("Integer is larger than 32 bits")
+            if bit_length > self.integer_length:
+                raise ValueError(f"Integer is larger than {self.integer_length} bits")
 
-            if bit_length > self.best_bit_length and overflow_list.get(number) is None:
+            if (self.dictionary or bit_length > self.best_bit_length) and overflow_list.get(number) is None:
                 overflow_list[number] = suffix_position
                 suffix_position += 1
+        # Le dictionnaire contient tous les entiers distincts, triés
+        if self.dictionary:
+            overflow_list = {number: position for position, number in enumerate(sorted(overflow_list))}
         end = time.perf_counter()
-        self._add_timer('overflow_list', f"{end - start:.6f}")
+        self._add_timer('overflow_list', end - start)
         return overflow_list
 
-    def _add_timer(self, code, time) -> None:
-        self.benchmark[code] = time
+    # Nombre de bits des positions dans un dictionnaire de total_distinct entiers
+    @staticmethod
+    def _dictionary_bit_length(total_distinct: int) -> int:
+        return max(1, (total_distinct - 1).bit_length())
+
+    # Ecriture par dictionnaire (après les meta) : la position de chaque entier
+    # dans le dictionnaire, puis les entiers du dictionnaire
+    def _write_dictionary(self, writer: BitWriter, dictionary: dict[int, int]) -> None:
+        for number in self.array:
+            writer.write(dictionary[number], self.best_bit_length)
+        for number in dictionary.keys():
+            writer.write(number, self.max)
+
+    # Lecture par dictionnaire des entiers de start à stop : chaque entrée
+    # du dictionnaire n'est lue qu'une fois
+    def _read_dictionary_range(self, reader: BitReader, start: int, stop: int) -> List[int]:
+        meta_length = self._meta_length()
+        dictionary_start = meta_length + (self.total_items * self.best_bit_length)
+        dictionary: dict[int, int] = {}
+        ints: List[int] = []
+        cursor = meta_length + (start * self.best_bit_length)
+        for _ in range(start, stop):
+            code = reader.read(cursor, self.best_bit_length)
+            cursor += self.best_bit_length
+            if code not in dictionary:
+                dictionary[code] = reader.read(dictionary_start + (code * self.max), self.max)
+            ints.append(dictionary[code])
+        return ints
+
+    # Lecture de plusieurs entiers : les positions sont triées et regroupées afin
+    # de ne décoder chaque zone qu'une seule fois, le résultat suit l'ordre demandé
+    def get_many(self, indices: Iterable[int]) -> array:
+        start = time.perf_counter()
+        indices = list(indices)
+        sorted_indices = sorted(set(indices))
+        if sorted_indices and (sorted_indices[0] < 0 or sorted_indices[-1] >= self.total_items):
+            raise IndexError('Unable to get number')
+        values = self._get_sorted(BitReader(self.words, self.words_length), sorted_indices)
+        ints = array(self.typecode, [values[i] for i in indices])
+        end = time.perf_counter()
+        self._add_timer('reading_many', end - start)
+        return ints
+
+    # Lecture des entiers de start à stop (mêmes règles que le découpage d'une liste)
+    def slice(self, start: int, stop: int) -> array:
+        timer_start = time.perf_counter()
+        start, stop, _ = slice(start, stop).indices(self.total_items)
+        ints = array(self.typecode, self._read_range(BitReader(self.words, self.words_length), start, max(start, stop)))
+        timer_end = time.perf_counter()
+        self._add_timer('reading_slice', timer_end - timer_start)
+        return ints
+
+    # Entiers de start à stop non décodés : les entiers, ou les positions dans la liste des overflow
+    # pour les entiers dont la place est donnée dans la seconde liste. Sans liste d'overflow,
+    # tous les entiers sont décodés
+    def _read_codes(self, reader: BitReader, start: int, stop: int) -> Tuple[List[int], List[int]]:
+        return self._read_range(reader, start, stop), []
+
+    def _read_overflow_table(self, reader: BitReader) -> List[int]:
+        return []
+
+    # Avec un dictionnaire, chaque entier est une position dans la liste des overflow
+    def _read_dictionary_codes(self, reader: BitReader, start: int, stop: int) -> Tuple[List[int], List[int]]:
+        cursor = self._meta_length() + (start * self.best_bit_length)
+        codes = [reader.read(cursor + (k * self.best_bit_length), self.best_bit_length) for k in range(stop - start)]
+        return codes, list(range(stop - start))
+
+    def _read_dictionary_table(self, reader: BitReader) -> List[int]:
+        dictionary_start = self._meta_length() + (self.total_items * self.best_bit_length)
+        return [reader.read(dictionary_start + (k * self.max), self.max) for k in range(self.total_overflow)]
 
-    def is_compression_better (self, bandwidth: float, latency: float) -> bool:
+    # Minimum et maximum de chaque zone
+    def _compute_zones(self, numbers: Sequence[int]) -> List[Tuple[int, int]]:
+        zones: List[Tuple[int, int]] = []
+        for start in range(0, len(numbers), self.zone_size):
+            zone = numbers[start:(start + self.zone_size)]
+            zones.append((min(zone), max(zone)))
+        return zones
+
+    # Entiers dont les zones sont calculées lors de la compression
+    def _zone_source(self) -> Sequence[int]:
+        return self.array
+
+    # Ecriture des zones après le tableau compressé (à partir d'un nouveau mot) :
+    # la taille des zones, le minimum et le maximum de chaque zone sur integer_length bits
+    # puis un mot de contrôle. Leur présence est indiquée par ZONE_MAP_FLAG dans les meta
+    def _write_zone_map(self, writer: BitWriter, zones: List[Tuple[int, int]]) -> None:
+        writer.pad()
+        writer.write(self.zone_size, 32)
+        for zone in zones:
+            for number in zone:
+                writer.write(self._zone_code(number), self.integer_length)
+        writer.write(ZONE_MAGIC, 32)
+
+    def _zone_code(self, number: int) -> int:
+        return number
+
+    def _zone_number(self, code: int) -> int:
+        return code
+
+    # Nombre de mots du tableau compressé, sans les zones ni l'index écrits après lui
+    def _payload_length(self) -> int:
+        if self.dictionary:
+            bit_length = (self._meta_length() + (self.total_items * self.best_bit_length) +
+                          (self.total_overflow * self.max))
+        else:
+            bit_length = self._compressed_bit_length(self.best_bit_length, self.total_items, self.total_overflow)
+        return math.ceil(bit_length / self.words_length)
+
+    # Lecture des zones si les meta indiquent qu'elles suivent le tableau compressé
+    def _read_zone_map(self, reader: BitReader) -> bool:
+        if not self.zone_map:
+            return False
+        words = self.words
+        start = self._payload_length()
+        if start >= len(words) or words[start] == 0:
+            raise ValueError("Corrupted zone map")
+        zone_size = words[start]
+        total_zones = math.ceil(self.total_items / zone_size)
+        end = start + 1 + (total_zones * 2 * (self.integer_length // self.words_length))
+        if end >= len(words) or words[end] != ZONE_MAGIC:
+            raise ValueError("Corrupted zone map")
+        codes = [reader.read(((start + 1) * self.words_length) + (k * self.integer_length), self.integer_length)
+                 for k in range(total_zones * 2)]
+        self.zone_size = zone_size
+        self.zones = [(self._zone_number(codes[k]), self._zone_number(codes[k + 1])) for k in range(0, len(codes), 2)]
+        return True
+
+    # Zones lues à la fin du tableau compressé, ou calculées en décodant le tableau une seule fois
+    def _get_zones(self, reader: BitReader) -> List[Tuple[int, int]]:
+        if not self.zones and self.total_items and not self._read_zone_map(reader):
+            start = time.perf_counter()
+            self.zones = [(min(values), max(values)) for values in
+                          (self._read_zone(reader, zone) for zone in range(math.ceil(self.total_items / self.zone_size)))]
+            end = time.perf_counter()
+            self._add_timer('zone_map', end - start)
+        return self.zones
+
+    # Entiers d'une zone
+    def _read_zone(self, reader: BitReader, zone: int) -> List[int]:
+        start = zone * self.zone_size
+        ints, overflow_positions = self._read_codes(reader, start, min(start + self.zone_size, self.total_items))
+        if overflow_positions:
+            overflow_table = self._get_overflow_table(reader)
+            for i in overflow_positions:
+                ints[i] = overflow_table[ints[i]]
+        return ints
+
+    # Positions des entiers compris entre low et high (inclus) : les zones en dehors de l'intervalle
+    # sont ignorées, celles comprises dans l'intervalle ne sont pas décodées, et les overflow
+    # ne sont comparés qu'une fois dans la liste des overflow
+    def _find_range(self, low: int, high: int, first_only: bool = False) -> Iterator[range]:
+        reader = BitReader(self.words, self.words_length)
+        matching_overflows = None
+        for zone, (zone_min, zone_max) in enumerate(self._get_zones(reader)):
+            if zone_max < low or zone_min > high:
+                continue
+            start = zone * self.zone_size
+            stop = min(start + self.zone_size, self.total_items)
+            if low <= zone_min and zone_max <= high:
+                yield range(start, stop)
+                continue
+            codes, overflow_positions = self._read_codes(reader, start, stop)
+            if overflow_positions and matching_overflows is None:
+                matching_overflows = {position for position, number in enumerate(self._get_overflow_table(reader))
+                                      if low <= number <= high}
+            overflow_positions = set(overflow_positions)
+            for k, code in enumerate(codes):
+                if (code in matching_overflows) if k in overflow_positions else (low <= code <= high):
+                    yield range(start + k, start + k + 1)
+                    if first_only:
+                        return
+
+    def min_value(self) -> int:
+        if not self.total_items:
+            raise ValueError("array is empty")
+        return min(zone[0] for zone in self._get_zones(BitReader(self.words, self.words_length)))
+
+    def max_value(self) -> int:
+        if not self.total_items:
+            raise ValueError("array is empty")
+        return max(zone[1] for zone in self._get_zones(BitReader(self.words, self.words_length)))
+
+    # Somme des entiers : les zones dont tous les entiers sont égaux ne sont pas décodées
+    def sum(self) -> int:
+        start = time.perf_counter()
+        reader = BitReader(self.words, self.words_length)
+        total = 0
+        for zone, (zone_min, zone_max) in enumerate(self._get_zones(reader)):
+            if zone_min == zone_max:
+                total += zone_min * (min((zone + 1) * self.zone_size, self.total_items) - (zone * self.zone_size))
+            else:
+                total += sum(self._read_zone(reader, zone))
+        end = time.perf_counter()
+        self._add_timer('query_sum', end - start)
+        return total
+
+    # Nombre d'entiers compris entre low et high (inclus)
+    def count_in_range(self, low: int, high: int) -> int:
+        start = time.perf_counter()
+        count = sum(len(positions) for positions in self._find_range(low, high))
+        end = time.perf_counter()
+        self._add_timer('query_count', end - start)
+        return count
+
+    # Position du premier entier égal à number, -1 s'il n'y en a pas
+    def find(self, number: int) -> int:
+        start = time.perf_counter()
+        position = next((positions[0] for positions in self._find_range(number, number, True)), -1)
+        end = time.perf_counter()
+        self._add_timer('query_find', end - start)
+        return position
+
+    # Positions des entiers compris entre low et high (inclus)
+    def filter_range(self, low: int, high: int) -> array:
+        start = time.perf_counter()
+        positions = array('I')
+        for matches in self._find_range(low, high):
+            positions.extend(matches)
+        end = time.perf_counter()
+        self._add_timer('query_filter', end - start)
+        return positions
+
+    # Enregistrement du tableau compressé dans un fichier (entiers en little-endian) :
+    # entête FILE_HEADER, mots compressés (meta comprises) puis index d'accès
+    def save(self, path: str) -> None:
+        if not len(self.words):
+            raise ValueError("nothing has been compressed, cannot save")
+        index = list(self.index) + list(self.overflow_index)
+        with open(path, 'wb') as file:
+            file.write(FILE_HEADER.pack(FILE_MAGIC, FILE_VERSION, FILE_COMPRESS_TYPES.index(self.compress_type),
+                                        self.index_step, len(self.words), len(self.index), len(self.overflow_index)))
+            file.write(_to_little_endian(array('I', self.words)))
+            file.write(_to_little_endian(array('Q', index)))
+
+    # Ouverture d'un fichier enregistré avec save() : le fichier est projeté en mémoire
+    # et get, get_many et slice lisent directement les mots projetés
+    @classmethod
+    def open(cls, path: str) -> 'BaseBitPacker':
+        with open(path, 'rb') as file:
+            try:
+                buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # Un fichier vide ne peut pas être projeté en mémoire
+                raise ValueError("Not a BitPacker file")
+        if len(buffer) < FILE_HEADER.size:
+            buffer.close()
+            raise ValueError("Not a BitPacker file")
+        magic, version, compress_type, index_step, total_words, total_index, total_overflow_index = \
+            FILE_HEADER.unpack_from(buffer)
+        # Un fichier tronqué donnerait des mots et un index plus courts que ceux de l'entête
+        file_length = FILE_HEADER.size + (total_words * 4) + ((total_index + total_overflow_index) * 8)
+        if (magic != FILE_MAGIC or version != FILE_VERSION or compress_type >= len(FILE_COMPRESS_TYPES) or
+                len(buffer) < file_length):
+            buffer.close()
+            raise ValueError("Not a BitPacker file")
+
+        packer = bit_packer_factory(FILE_COMPRESS_TYPES[compress_type], [])
+        packer._mmap = buffer
+        offset = FILE_HEADER.size
+        packer.words = _mapped_array(buffer, offset, 'I', total_words)
+        offset += total_words * 4
+        index = _mapped_array(buffer, offset, 'Q', total_index + total_overflow_index)
+        packer.index_step = index_step
+        packer.index = index[:total_index]
+        packer.overflow_index = index[total_index:]
+        packer._read_mapped()
+        return packer
+
+    # Lecture des meta d'un fichier ouvert avec open()
+    def _read_mapped(self) -> None:
+        self._read_meta(BitReader(self.words, self.words_length))
+
+    # Fermeture du fichier ouvert avec open()
+    def close(self) -> None:
+        if self._mmap is not None:
+            # Plus aucun entier n'est lisible une fois le fichier fermé
+            self.words = []
+            self.index = []
+            self.overflow_index = []
+            self.total_items = 0
+            self.total_overflow = 0
+            self._mmap.close()
+            self._mmap = None
+
+    def _add_timer(self, code: str, seconds: float) -> None:
+        self.benchmark[code] = f"{seconds:.6f}"
+        if code not in self.timings:
+            self.timings[code] = deque(maxlen=self.timings_size)
+        self.timings[code].append(seconds)
+
+    # Mots compressés : les remplacer (compress, uncompress, open, close) vide le cache
+    @property
+    def words(self) -> Sequence[int]:
+        return self._words
+
+    @words.setter
+    def words(self, words: Sequence[int]) -> None:
+        self._words = words
+        self.clear_cache()
+
+    # Activation du cache des blocs de block_size entiers décodés, limité à max_entries
+    # blocs et / ou max_bytes octets (le bloc le moins récemment lu est retiré en premier)
+    def enable_cache(self, max_entries: Optional[int] = 1024, max_bytes: Optional[int] = None,
+                     block_size: int = 128) -> None:
+        if block_size <= 0:
+            raise ValueError("block_size must be positive")
+        if max_entries is None and max_bytes is None:
+            raise ValueError("max_entries or max_bytes must be given")
+        self.cache = OrderedDict()
+        self.cache_block_size = block_size
+        self.cache_max_entries = max_entries
+        self.cache_max_bytes = max_bytes
+        self.clear_cache()
+
+    def disable_cache(self) -> None:
+        self.cache = None
+        self.clear_cache()
+
+    def clear_cache(self) -> None:
+        if self.cache is not None:
+            self.cache.clear()
+        self.cache_bytes = 0
+        self._overflow_table = None
+        self.zones = []
+
+    # Liste des overflow décodée une seule fois (comptée dans la taille du cache)
+    def _get_overflow_table(self, reader: BitReader) -> Sequence[int]:
+        if self._overflow_table is None:
+            self._overflow_table = array('Q' if self.max > 32 else 'I', self._read_overflow_table(reader))
+            self.cache_bytes += self._overflow_table.itemsize * len(self._overflow_table)
+        return self._overflow_table
+
+    # Seul le tableau 'blocked' reçoit de nouveaux entiers sans être recompressé
+    def extend(self, numbers: Iterable[int]) -> None:
+        raise ValueError(f"{self.compress_type} arrays cannot be extended, use 'blocked'")
+
+    def append(self, number: int) -> None:
+        self.extend([number])
+
+    def set(self, i: int, number: int) -> None:
+        raise ValueError(f"{self.compress_type} arrays cannot be modified in place, use 'blocked'")
+
+    # Après une modification de l'entier i : le cache du bloc est retiré et sa zone mise à jour
+    def _invalidate(self, i: int, number: int, appended: bool, reader: Optional[BitReader] = None) -> None:
+        if self.cache is not None:
+            block = self.cache.pop(i // self.cache_block_size, None)
+            if block is not None:
+                self.cache_bytes -= block.itemsize * len(block)
+        if self.zones:
+            zone = i // self.zone_size
+            if zone == len(self.zones):
+                self.zones.append((number, number))
+            elif appended:
+                self.zones[zone] = (min(self.zones[zone][0], number), max(self.zones[zone][1], number))
+            else:
+                values = self._read_zone(reader, zone)
+                self.zones[zone] = (min(values), max(values))
+
+    # Lecture d'un entier dans le bloc décodé qui le contient
+    def _get_cached(self, i: int) -> int:
+        block = i // self.cache_block_size
+        values = self.cache.get(block)
+        if values is not None:
+            self.cache_stats['hits'] += 1
+            self.cache.move_to_end(block)
+            return values[i - (block * self.cache_block_size)]
+
+        self.cache_stats['misses'] += 1
+        start = block * self.cache_block_size
+        stop = min(start + self.cache_block_size, self.total_items)
+        values = array(self.typecode, self._read_range(BitReader(self.words, self.words_length), start, stop))
+        self.cache[block] = values
+        self.cache_bytes += values.itemsize * len(values)
+        # On retire les blocs les moins récemment lus (le dernier bloc décodé est toujours gardé)
+        while len(self.cache) > 1 and ((self.cache_max_entries is not None and len(self.cache) > self.cache_max_entries)
+                                       or (self.cache_max_bytes is not None and self.cache_bytes > self.cache_max_bytes)):
+            _, evicted = self.cache.popitem(last=False)
+            self.cache_bytes -= evicted.itemsize * len(evicted)
+            self.cache_stats['evictions'] += 1
+        return values[i - start]
+
+    # Statistiques des mesures de chaque étape (nombre, total, min, médiane, p99)
+    def timing_stats(self) -> dict[str, dict[str, float]]:
+        return {code: timing_stats(samples) for code, samples in self.timings.items()}
+
+    # chunks : nombre de trames lorsque l'envoi est fait avec send_frames
+    def is_compression_better (self, bandwidth: float, latency: float, chunks: int = 1) -> bool:
         compressed_size_bytes: int = len(self.compressed) * 4
         compression_time: float = float(self.benchmark.get("compression", 0))
         decompression_time: float = float(self.benchmark.get("decompression", 0))
-        raw_time: float = latency + (len(self.array) * 4) / bandwidth
-        compressed_time: float = latency + compression_time + compressed_size_bytes / bandwidth + decompression_time
+        raw_time: float = latency + (len(self.array) * (self.integer_length // 8)) / bandwidth
+        compressed_time: float = transfer_time(compression_time, compressed_size_bytes, decompression_time,
+                                               bandwidth, latency, chunks)
         return compressed_time < raw_time
 
 #####
@@ -148,260 +772,1675 @@ class BaseBitPacker:
 # sans préocupation pour leur continuité)
 #####
 class BitPackerCrossing(BaseBitPacker):
-    def compress(self):
+    compress_type = 'crossing'
+
+    # zone_map ajoute le minimum et le maximum de chaque zone à la fin du tableau compressé
+    def compress(self, zone_map: bool = False):
         if not len(self.array):
-            raise "no array has been given, cannot compress"
+            raise ValueError("no array has been given, cannot compress")
         start = time.perf_counter()
+        writer = BitWriter(self.words_length)
         # On écrit les métadonnées
-        phrase: str = self._write_meta()
+        self._write_meta(writer)
         overflow_list = self._get_overflow_list()
-        # On écrit dans "suffix" tous les entiers overflow
-        suffix = "".join([self._int_to_bits(key, self.max) for key in overflow_list.keys()])
 
         self.total_overflow = len(overflow_list)
-        phrase += self._int_to_bits(self.total_overflow, 32)
+        self._write_total_overflow(writer, zone_map)
 
-        # On écrit soit l'entier, soit la position de l'overflow
-        for number in self.array:
-            bit_length = number.bit_length()
-            if bit_length <= self.best_bit_length:
-                phrase += "0" + self._int_to_bits(number, self.best_bit_length)
-            else:
-                phrase += "1" + self._int_to_bits(overflow_list.get(number), self.best_bit_length)
+        if self.dictionary:
+            self._write_dictionary(writer, overflow_list)
+        else:
+            # On écrit soit l'entier, soit la position de l'overflow
+            # (le bit de poids fort indique s'il s'agit d'un overflow)
+            item_length = self.best_bit_length + 1
+            overflow_flag = 1 << self.best_bit_length
+            for number in self.array:
+                if number.bit_length() <= self.best_bit_length:
+                    writer.write(number, item_length)
+                else:
+                    writer.write(overflow_flag | overflow_list[number], item_length)
 
-        # On ajoute les overflow
-        phrase += suffix
-        # On ajoute des "0" à la fin pour que le dernier entier compressé soit correct
-        padding_length = (32 - len(phrase) % 32) % 32
-        phrase += "0" * padding_length
+            # On ajoute les overflow
+            for number in overflow_list.keys():
+                writer.write(number, self.max)
 
-        # Maintenant que nous avons la suite de bits, on écrit les entiers de 32 bits
-        self.words = [phrase[i:i + self.words_length] for i in range(0, len(phrase), self.words_length)]
-        self.compressed = [self._bits_to_int(word) for word in self.words]
+        zones = self._compute_zones(self._zone_source()) if zone_map else []
+        if zone_map:
+            self._write_zone_map(writer, zones)
+        # On ajoute des "0" à la fin pour que le dernier entier compressé soit correct
+        self.compressed = writer.getvalue()
+        self.words = self.compressed
+        self.zones = zones
+        self.zone_map = zone_map
         end = time.perf_counter()
-        self._add_timer('compression', f"{end - start:.6f}")
+        self._add_timer('compression', end - start)
 
     def uncompress(self, compressed_array: List[int]) -> List[int]:
         start = time.perf_counter()
-        # On convertit en bits et on les met à la suite des autres
-        self.words = [self._int_to_bits(n, self.words_length) for n in compressed_array]
-        phrase = "".join(self.words)
-        cursor = self._read_meta(phrase)
+        self.words = _to_words(compressed_array)
+        reader = BitReader(self.words, self.words_length)
+        self._read_meta(reader)
+        # On retransforme les bits compressés en entiers
+        ints: List[int] = self._read_range(reader, 0, self.total_items)
+        end = time.perf_counter()
+        self._add_timer('decompression', end - start)
+        return ints
+
+    def get(self, i: int) -> int:
+        if not 0 <= i < self.total_items:
+            raise IndexError('Unable to get number')
+        start = time.perf_counter()
+        if self.cache is not None:
+            number = self._get_cached(i)
+        else:
+            number = self._read_range(BitReader(self.words, self.words_length), i, i + 1)[0]
+        end = time.perf_counter()
+        self._add_timer('reading_int', end - start)
+        return number
 
-        overflow_index_start = (
-                cursor +
-                (self.total_items * self.best_bit_length) +
-                self.total_items
-        )
+    # Lecture des entiers de start (inclus) à stop (exclu) : chaque entier
+    # est à une position fixe, il n'y a rien à parcourir pour l'atteindre
+    def _read_range(self, reader: BitReader, start: int, stop: int) -> List[int]:
+        if self.dictionary:
+            return self._read_dictionary_range(reader, start, stop)
+        meta_length = self._meta_length()
+        item_length = self.best_bit_length + 1
+        overflow_flag = 1 << self.best_bit_length
+        overflow_index_start = meta_length + (self.total_items * item_length)
+        # On place le curseur à l'emplacement du premier entier ou de sa position dans le cas d'un overflow
+        cursor = meta_length + (item_length * start)
         ints: List[int] = []
-        # On retransforme les bits compressés en entiers
-        for i in range(self.total_items):
-            number_type: str = phrase[cursor:(cursor + 1)]
-            cursor += 1
+        for _ in range(start, stop):
+            bits = reader.read(cursor, item_length)
+            cursor += item_length
             # On teste si l'entier est un overflow
-            if number_type == '1':
-                # On récupère la position
-                bits: str = phrase[cursor:(cursor + self.best_bit_length)]
-                cursor += self.best_bit_length
-                position: int = self._bits_to_int(bits)
+            if bits & overflow_flag:
                 # On récupère l'entier dans les overflows grâce à la position
-                overflow_position = (overflow_index_start + (position * self.max))
-                overflow_bits = phrase[overflow_position:(overflow_position + self.max)]
-                ints.append(self._bits_to_int(overflow_bits))
+                overflow_position = overflow_index_start + ((bits ^ overflow_flag) * self.max)
+                ints.append(reader.read(overflow_position, self.max))
             else:
-                # On récupère l'entier
-                bits: str = phrase[cursor:(cursor + self.best_bit_length)]
-                ints.append(self._bits_to_int(bits))
-                cursor += self.best_bit_length
-        end = time.perf_counter()
-        self._add_timer('decompression', f"{end - start:.6f}")
+                ints.append(bits)
         return ints
 
-    def get(self, i: int) -> int:
+    def _get_sorted(self, reader: BitReader, indices: List[int]) -> dict[int, int]:
+        return {i: self._read_range(reader, i, i + 1)[0] for i in indices}
+
+    def _read_codes(self, reader: BitReader, start: int, stop: int) -> Tuple[List[int], List[int]]:
+        if self.dictionary:
+            return self._read_dictionary_codes(reader, start, stop)
+        item_length = self.best_bit_length + 1
+        overflow_flag = 1 << self.best_bit_length
+        cursor = self._meta_length() + (item_length * start)
+        codes: List[int] = []
+        overflow_positions: List[int] = []
+        for k in range(stop - start):
+            bits = reader.read(cursor + (k * item_length), item_length)
+            if bits & overflow_flag:
+                overflow_positions.append(k)
+                bits ^= overflow_flag
+            codes.append(bits)
+        return codes, overflow_positions
+
+    def _read_overflow_table(self, reader: BitReader) -> List[int]:
+        if self.dictionary:
+            return self._read_dictionary_table(reader)
+        overflow_index_start = self._meta_length() + (self.total_items * (self.best_bit_length + 1))
+        return [reader.read(overflow_index_start + (k * self.max), self.max) for k in range(self.total_overflow)]
+
+    # Modification d'un entier dans les mots compressés : il est écrit à sa place s'il tient sur
+    # le nombre de bits idéal, sinon sa position dans la liste des overflow (ou du dictionnaire) est écrite.
+    # Un nouvel overflow est ajouté à la fin de la liste, qui termine le tableau compressé (sans zones),
+    # tant que sa position tient sur le nombre de bits idéal et l'entier sur le maximum de bits
+    def set(self, i: int, number: int) -> None:
+        if not 0 <= i < self.total_items:
+            raise IndexError('Unable to set number')
+        if number < 0:
+            raise ValueError("Integer is negative")
+        if number.bit_length() > self.integer_length:
+            raise ValueError(f"Integer is larger than {self.integer_length} bits")
         start = time.perf_counter()
-        phrase = "".join(self.words)
-        # On place le curseur à l'emplacement de l'entier ou de sa position dans le cas d'un overflow
-        cursor = 76 + ((self.best_bit_length + 1) * i)
-        bits = phrase[cursor:(cursor + self.best_bit_length + 1)]
-        number_type = bits[:1]
-        overflow_index_start = (
-                76 +
-                (self.total_items * self.best_bit_length) +
-                self.total_items
-        )
-        # On teste si l'entier est un overflow
-        if number_type == '1':
-            position = self._bits_to_int(bits[1:])
-            overflow_position = (overflow_index_start + (position * self.max))
-            overflow_bits = phrase[overflow_position:(overflow_position + self.max)]
-            end = time.perf_counter()
-            self._add_timer('reading_int', f"{end - start:.6f}")
-            return self._bits_to_int(overflow_bits)
+        self._make_writable()
+        reader = BitReader(self.words, self.words_length)
+        zones = self._get_zones(reader) if self.zone_map else self.zones
+        overflow_table = self._get_overflow_table(reader)
+        meta_length = self._meta_length()
+        if self.dictionary:
+            if number not in overflow_table:
+                raise ValueError("Integer is not in the dictionary, use 'blocked' to modify this array")
+            self._update_bits(meta_length + (i * self.best_bit_length), overflow_table.index(number),
+                              self.best_bit_length)
         else:
-            end = time.perf_counter()
-            self._add_timer('reading_int', f"{end - start:.6f}")
-            return self._bits_to_int(bits[1:])
+            item_length = self.best_bit_length + 1
+            overflow_flag = 1 << self.best_bit_length
+            position = meta_length + (i * item_length)
+            if number.bit_length() <= self.best_bit_length:
+                self._update_bits(position, number, item_length)
+            elif number in overflow_table:
+                self._update_bits(position, overflow_flag | overflow_table.index(number), item_length)
+            else:
+                if self.zone_map or self.total_overflow >= overflow_flag or number.bit_length() > self.max:
+                    raise ValueError("Integer does not fit in the compressed array, use 'blocked' to modify it")
+                overflow_end = meta_length + (self.total_items * item_length) + ((self.total_overflow + 1) * self.max)
+                self._update_bits(overflow_end - self.max, number, self.max)
+                self._update_bits(meta_length - 32, self.total_overflow + 1, 32)
+                self._update_bits(position, overflow_flag | self.total_overflow, item_length)
+                self.total_overflow += 1
+                overflow_table.append(number)
+                self.cache_bytes += overflow_table.itemsize
+        self._invalidate(i, number, False, reader)
+        if self.zone_map:
+            # Les zones écrites après le tableau compressé sont mises à jour
+            zone = i // self.zone_size
+            cursor = ((self._payload_length() + 1) * self.words_length) + (zone * 2 * self.integer_length)
+            for k, zone_number in enumerate(zones[zone]):
+                self._update_bits(cursor + (k * self.integer_length), self._zone_code(zone_number), self.integer_length)
+        end = time.perf_counter()
+        self._add_timer('update', end - start)
+
+    # Les mots projetés en mémoire (open) ne sont pas modifiables
+    def _make_writable(self) -> None:
+        if not isinstance(self.words, list):
+            raise ValueError("a mapped array cannot be modified")
+        self.compressed = self.words
+
+    # Ecriture de length bits à la position donnée, en ajoutant les mots nécessaires
+    def _update_bits(self, position: int, value: int, length: int) -> None:
+        total_words = math.ceil((position + length) / self.words_length)
+        if total_words > len(self.words):
+            self.words.extend([0] * (total_words - len(self.words)))
+        _write_bits(self.words, position, value, length, self.words_length)
 
 #####
 # BitPacker sans "crossing" (les bits des entiers ne sont pas séparés lors du
 # passage en mot de 32 bits)
 #####
 class BitPackerNoCrossing(BaseBitPacker):
-    def compress(self):
+    compress_type = 'nocrossing'
+    # Les codes du dictionnaire seraient écrits à la suite et couperaient les mots :
+    # les tableaux nocrossing ne passent pas au dictionnaire (ceux déjà écrits se lisent toujours)
+    auto_dictionary = False
+
+    # Position atteinte après l'écriture de "count" entiers de "slot_length" bits
+    # à partir de "cursor", un entier qui ne tient pas dans le mot courant
+    # étant écrit au début du mot suivant
+    @staticmethod
+    def _slots_end(cursor: int, count: int, slot_length: int, words_length: int = 32) -> int:
+        available_space = (words_length - cursor % words_length) % words_length
+        first = min(count, available_space // slot_length)
+        cursor += first * slot_length
+        count -= first
+        if count == 0:
+            return cursor
+        cursor += (words_length - cursor % words_length) % words_length
+        full_words, rest = divmod(count - 1, words_length // slot_length)
+        return cursor + (full_words * words_length) + ((rest + 1) * slot_length)
+
+    # Le bourrage de fin de mot est pris en compte : chaque entier occupe
+    # nb + 2 bits et chaque overflow max + 1 bits, sans jamais être coupé
+    def _compressed_bit_length(self, bit_length: int, total_items: int, total_overflow: int) -> Optional[int]:
+        if bit_length + 2 > self.words_length or self.max + 1 > self.words_length:
+            return None
+        meta_length = self._meta_length()
+        cursor = self._slots_end(meta_length, total_items, bit_length + 2, self.words_length)
+        return self._slots_end(cursor, total_overflow, self.max + 1, self.words_length)
+
+    # embed_index ajoute l'index d'accès à la fin du tableau compressé,
+    # zone_map le minimum et le maximum de chaque zone (avant l'index)
+    def compress(self, embed_index: bool = False, zone_map: bool = False):
         if not len(self.array):
-            raise "no array has been given, cannot compress"
+            raise ValueError("no array has been given, cannot compress")
         start = time.perf_counter()
+        writer = BitWriter(self.words_length)
         # On écrit les métadonnées
-        phrase: str = self._write_meta()
+        self._write_meta(writer)
         overflow_list = self._get_overflow_list()
-        # On écrit dans "suffix" tous les entiers overflow
-        suffix = "".join([self._int_to_bits(key, self.max) for key in overflow_list.keys()])
 
         self.total_overflow = len(overflow_list)
-        phrase += self._int_to_bits(self.total_overflow, 32)
+        self._write_total_overflow(writer, zone_map)
+        self.index = []
+        self.overflow_index = []
 
         # On écrit soit l'entier, soit la position de l'overflow
-        for number in self.array:
+        # précédés du code "10" (entier) ou "11" (overflow)
+        item_length = self.best_bit_length + 2
+        integer_code = 0b10 << self.best_bit_length
+        overflow_code = 0b11 << self.best_bit_length
+        for i, number in enumerate(self.array):
             bit_length = number.bit_length()
             if bit_length > 30:
                 # On a une limite de 30 car on utilise deux bits comme code :
                 # un bit pour indiquer le début d'un entier
                 # un bit pour signaler si c'est un entier overflow
                 raise ValueError("Integer is larger than 30 bits")
+            # On teste si l'on doit écrire l'entier dans un nouveau mot
+            if item_length > writer.available():
+                writer.pad()
+            if i % self.index_step == 0:
+                self.index.append(len(writer))
+            # On teste si l'entier est un overflow
+            if bit_length <= self.best_bit_length:
+                writer.write(integer_code | number, item_length)
             else:
-                available_space = (32 - len(phrase) % 32) % 32
-                # On teste si l'entier est un overflow
-                if bit_length <= self.best_bit_length:
-                    # On teste si l'on doit écrire l'entier dans un nouveau mot
-                    if bit_length + 2 > available_space:
-                        phrase += "0" * available_space
-                    phrase += "10" + self._int_to_bits(number, self.best_bit_length)
-                else:
-                    if self.total_overflow.bit_length() + 3 > available_space:
-                        phrase += "0" * available_space
-                    phrase += "11" + self._int_to_bits(overflow_list.get(number), self.best_bit_length)
-                    suffix += self._int_to_bits(number, self.max)
+                writer.write(overflow_code | overflow_list[number], item_length)
 
-        # On ajoute les overflow
-        for i in range(0, len(suffix), self.max):
-            available_space = (32 - len(phrase) % 32) % 32
-            if self.max + 2 > available_space:
-                phrase += "0" * available_space
-            phrase += "1"
-            for y in range(0, self.max):
-                phrase += suffix[i + y]
+        # On ajoute les overflow (précédés d'un "1")
+        overflow_length = self.max + 1
+        overflow_code = 1 << self.max
+        for i, number in enumerate(overflow_list.keys()):
+            if overflow_length > writer.available():
+                writer.pad()
+            if i % self.index_step == 0:
+                self.overflow_index.append(len(writer))
+            writer.write(overflow_code | number, overflow_length)
 
         # On ajoute des "0" à la fin pour que le dernier entier compressé soit correct
-        padding_length = (32 - len(phrase) % 32) % 32
-        phrase = phrase + ("0" * padding_length)
-
-        self.words = [phrase[i:i + self.words_length] for i in range(0, len(phrase), self.words_length)]
-        self.compressed = [self._bits_to_int(word) for word in self.words]
+        writer.pad()
+        zones = self._compute_zones(self._zone_source()) if zone_map else []
+        if zone_map:
+            self._write_zone_map(writer, zones)
+        if embed_index:
+            self._write_index(writer)
+        self.compressed = writer.getvalue()
+        self.words = self.compressed
+        self.zones = zones
+        self.zone_map = zone_map
         end = time.perf_counter()
-        self._add_timer('compression', f"{end - start:.6f}")
+        self._add_timer('compression', end - start)
 
     def uncompress(self, compressed_array: List[int]) -> List[int]:
         start = time.perf_counter()
-        # On convertit en bits et on les met à la suite des autres
-        self.words = [self._int_to_bits(n, self.words_length) for n in compressed_array]
-        phrase = "".join(self.words)
-        cursor = self._read_meta(phrase)
+        self.words = _to_words(compressed_array)
+        reader = BitReader(self.words, self.words_length)
+        cursor = self._read_meta(reader)
+        if self.dictionary:
+            ints: List[int] = self._read_dictionary_range(reader, 0, self.total_items)
+            end = time.perf_counter()
+            self._add_timer('decompression', end - start)
+            return ints
+        build_index = not self._read_index(reader)
+        if build_index:
+            self.index = []
 
         ints: List[int] = []
-        proceed = True
+        overflow_positions: List[int] = []
+        overflow_flag = 1 << self.best_bit_length
         # On retransforme les bits compressés en entiers
-        while cursor < len(phrase) and proceed:
-            # On récupère le premier bit qui indique si une suite de "0" s'arrête ici
-            char: str = phrase[cursor:(cursor + 1)]
-            cursor += 1
-            
-            if char == '1':
-                number_type = phrase[cursor:(cursor + 1)]
-                cursor += 1
-
-                # On teste si l'entier est un overflow
-                if number_type == '1':
-                    bits: str = phrase[cursor:(cursor + self.best_bit_length)]
-                    position: int = self._bits_to_int(bits)
-                    overflow_bits = self._get_overflow(phrase, position)
-                    ints.append(self._bits_to_int(overflow_bits))
-                else:
-                    bits: str = phrase[cursor:(cursor + self.best_bit_length)]
-                    ints.append(self._bits_to_int(bits))
+        # (les overflow sont remplacés une fois la liste des overflow lue)
+        for i in range(self.total_items):
+            # On saute les "0" jusqu'au bit qui indique le début d'un entier
+            cursor = reader.find_one(cursor)
+            if build_index and i % self.index_step == 0:
+                self.index.append(cursor)
+            bits = reader.read(cursor + 1, self.best_bit_length + 1)
+            cursor += self.best_bit_length + 2
 
-                cursor += self.best_bit_length
+            # On teste si l'entier est un overflow
+            if bits & overflow_flag:
+                overflow_positions.append(i)
+                bits ^= overflow_flag
+            ints.append(bits)
 
-            if len(ints) == self.total_items:
-                proceed = False
+        # Les overflow commencent juste après le dernier entier : on les lit tous en une fois
+        overflow_list = self._read_overflow_list(reader, cursor, build_index)
+        for i in overflow_positions:
+            ints[i] = overflow_list[ints[i]]
         end = time.perf_counter()
-        self._add_timer('decompression', f"{end - start:.6f}")
+        self._add_timer('decompression', end - start)
         return ints
 
+    # Lecture de la liste des overflow qui commence à la position cursor
+    def _read_overflow_list(self, reader: BitReader, cursor: int, build_index: bool = False) -> List[int]:
+        start = time.perf_counter()
+        if build_index:
+            self.overflow_index = []
+        overflow_list: List[int] = []
+        for i in range(self.total_overflow):
+            cursor = reader.find_one(cursor)
+            if build_index and i % self.index_step == 0:
+                self.overflow_index.append(cursor)
+            overflow_list.append(reader.read(cursor + 1, self.max))
+            cursor += self.max + 1
+        end = time.perf_counter()
+        self._add_timer('overflow_list', end - start)
+        return overflow_list
+
     def get(self, i: int) -> int:
-        phrase = "".join(self.words)
-        cursor = self._read_meta(phrase)
-        total_words: int = 0
-        while cursor < len(phrase):
-            char: str = phrase[cursor:(cursor + 1)]
-            cursor += 1
-            # On teste jusqu'à trouver le bit qui indique si la suite représente
-            # un entier ou une position
-            if char == '0':
-                continue
+        if not 0 <= i < self.total_items:
+            raise IndexError('Unable to get number')
+        start = time.perf_counter()
+        if self.cache is not None:
+            number = self._get_cached(i)
+        else:
+            number = self._read_range(BitReader(self.words, self.words_length), i, i + 1)[0]
+        end = time.perf_counter()
+        self._add_timer('reading_int', end - start)
+        return number
+
+    # Lecture des entiers de start (inclus) à stop (exclu) sans remplacer les overflow :
+    # retourne les entiers (ou positions d'overflow) et l'emplacement des overflow
+    def _read_codes(self, reader: BitReader, start: int, stop: int) -> Tuple[List[int], List[int]]:
+        if self.dictionary:
+            return self._read_dictionary_codes(reader, start, stop)
+        # On part de l'entier échantillonné le plus proche et on saute les suivants
+        cursor = self.index[start // self.index_step]
+        for _ in range(start % self.index_step):
+            cursor = reader.find_one(cursor) + self.best_bit_length + 2
+        ints: List[int] = []
+        overflow_positions: List[int] = []
+        overflow_flag = 1 << self.best_bit_length
+        for i in range(stop - start):
+            cursor = reader.find_one(cursor)
+            bits = reader.read(cursor + 1, self.best_bit_length + 1)
+            cursor += self.best_bit_length + 2
+            # On teste si l'entier est un overflow
+            if bits & overflow_flag:
+                overflow_positions.append(i)
+                bits ^= overflow_flag
+            ints.append(bits)
+        return ints, overflow_positions
+
+    # Remplacement des positions d'overflow par les overflow : chacun est lu une seule fois,
+    # et toute la liste des overflow est lue si la plupart de ses éléments sont nécessaires
+    def _resolve_overflows(self, reader: BitReader, ints: List[int], overflow_positions: List[int]) -> None:
+        # Avec le cache, la liste des overflow est décodée une seule fois et gardée
+        if self.cache is not None and overflow_positions:
+            overflow_table = self._get_overflow_table(reader)
+            for i in overflow_positions:
+                ints[i] = overflow_table[ints[i]]
+            return
+        if len(overflow_positions) * self.index_step > self.total_overflow:
+            overflow_list = self._read_overflow_list(reader, self.overflow_index[0])
+            for i in overflow_positions:
+                ints[i] = overflow_list[ints[i]]
+            return
+        overflows: dict[int, int] = {}
+        for i in overflow_positions:
+            if ints[i] not in overflows:
+                overflows[ints[i]] = self._get_overflow(reader, ints[i])
+            ints[i] = overflows[ints[i]]
+
+    def _read_range(self, reader: BitReader, start: int, stop: int) -> List[int]:
+        if self.dictionary:
+            return self._read_dictionary_range(reader, start, stop)
+        ints, overflow_positions = self._read_codes(reader, start, stop)
+        self._resolve_overflows(reader, ints, overflow_positions)
+        return ints
+
+    # Les positions sont regroupées par bloc de l'index : chaque bloc n'est parcouru qu'une fois
+    def _get_sorted(self, reader: BitReader, indices: List[int]) -> dict[int, int]:
+        if self.dictionary:
+            return {i: self._read_dictionary_range(reader, i, i + 1)[0] for i in indices}
+        ints: List[int] = []
+        overflow_positions: List[int] = []
+        for _, block in groupby(indices, key=lambda i: i // self.index_step):
+            block = list(block)
+            codes, block_overflows = self._read_codes(reader, block[0], block[-1] + 1)
+            block_overflows = set(block_overflows)
+            for i in block:
+                if i - block[0] in block_overflows:
+                    overflow_positions.append(len(ints))
+                ints.append(codes[i - block[0]])
+        self._resolve_overflows(reader, ints, overflow_positions)
+        return dict(zip(indices, ints))
+
+    def _read_overflow_table(self, reader: BitReader) -> List[int]:
+        if self.dictionary:
+            return self._read_dictionary_table(reader)
+        if not self.total_overflow:
+            return []
+        return self._read_overflow_list(reader, self.overflow_index[0])
+
+    def _get_overflow(self, reader: BitReader, position: int) -> int:
+        start = time.perf_counter()
+        # On part de l'overflow échantillonné le plus proche et on saute les suivants
+        cursor = self.overflow_index[position // self.index_step]
+        for _ in range(position % self.index_step):
+            cursor = reader.find_one(cursor) + self.max + 1
+        cursor = reader.find_one(cursor)
+        end = time.perf_counter()
+        self._add_timer('reading_overflow', end - start)
+        return reader.read(cursor + 1, self.max)
+
+    # Ecriture de l'index après le dernier mot : positions (sur 64 bits)
+    # des entiers puis des overflow échantillonnés, le pas de l'index et un mot de contrôle.
+    # Les anciennes versions ignorent ces mots lors de la décompression
+    def _write_index(self, writer: BitWriter) -> None:
+        for position in self.index + self.overflow_index:
+            writer.write(position, 64)
+        writer.write(self.index_step, 32)
+        writer.write(INDEX_MAGIC, 32)
+
+    # Lecture de l'index s'il est présent à la fin du tableau compressé
+    def _read_index(self, reader: BitReader) -> bool:
+        words = reader.words
+        if len(words) < 2 or words[-1] != INDEX_MAGIC or words[-2] == 0:
+            return False
+        index_step = words[-2]
+        total_index = math.ceil(self.total_items / index_step)
+        total_overflow_index = math.ceil(self.total_overflow / index_step)
+        start = len(words) - 2 - ((total_index + total_overflow_index) * 2)
+        if start < 0:
+            return False
+        positions = [reader.read((start + (k * 2)) * self.words_length, 64)
+                     for k in range(total_index + total_overflow_index)]
+        self.index_step = index_step
+        self.index = positions[:total_index]
+        self.overflow_index = positions[total_index:]
+        return True
+
+#####
+# BitPacker par blocs : chaque bloc de block_size entiers choisit son propre
+# nombre de bits idéal et sa propre liste d'overflow (méthode crossing dans le bloc).
+# Un répertoire donne la position (en mots) de chaque bloc pour garder l'accès direct
+#####
+class BitPackerBlocked(BaseBitPacker):
+    compress_type = 'blocked'
+
+    def __init__(self, array: List[int] = []):
+        super().__init__(array)
+        self.block_size = 128
+        # Tableau modifiable (append, extend, set) : les mots de chaque bloc complet
+        # et les entiers du dernier bloc, pas encore compressés
+        self.blocks: Optional[List[List[int]]] = None
+        self.tail: List[int] = []
+        self.encoded_lengths: List[int] = []
+        # Un bloc est recompressé lorsque les overflow ajoutés l'ont agrandi de plus de compaction_threshold
+        self.compaction_threshold = 0.5
+
+    # Les mots compressés remplacés (compress, uncompress, open) ne sont plus modifiables
+    @property
+    def words(self) -> Sequence[int]:
+        return self._words
+
+    @words.setter
+    def words(self, words: Sequence[int]) -> None:
+        self._words = words
+        self.clear_cache()
+        self.blocks = None
+        self.tail = []
+        self._dirty = False
+
+    # Après une modification, le tableau compressé est reconstruit lorsqu'il est lu
+    @property
+    def compressed(self) -> Sequence[int]:
+        if self._dirty:
+            self._assemble()
+        return self._compressed
+
+    @compressed.setter
+    def compressed(self, compressed: Sequence[int]) -> None:
+        self._compressed = compressed
+
+    # Le nombre de bits idéal est calculé pour chaque bloc lors de la compression
+    def _find_best_bit_length(self):
+        pass
+
+    # Meta : nombre total d'entiers et taille des blocs
+    def _read_meta(self, reader: BitReader) -> int:
+        start = time.perf_counter()
+        self.total_items = reader.read(0, 32)
+        self.block_size = reader.read(32, 32)
+        end = time.perf_counter()
+        self._add_timer('read_meta', end - start)
+        return 64
+
+    def _write_meta(self, writer: BitWriter) -> None:
+        start = time.perf_counter()
+        writer.write(self.total_items, 32)
+        writer.write(self.block_size, 32)
+        end = time.perf_counter()
+        self._add_timer('writing_meta', end - start)
+
+    def compress(self):
+        if not len(self.array):
+            raise ValueError("no array has been given, cannot compress")
+        start = time.perf_counter()
+        writer = BitWriter(self.words_length)
+        # On écrit les métadonnées
+        self._write_meta(writer)
+
+        # Les blocs commencent chacun au début d'un mot, après le répertoire
+        total_blocks = math.ceil(self.total_items / self.block_size)
+        blocks_writer = BitWriter(self.words_length)
+        self.total_overflow = 0
+        for block_start in range(0, self.total_items, self.block_size):
+            writer.write(2 + total_blocks + len(blocks_writer.words), 32)
+            self.total_overflow += self._write_block(blocks_writer, self.array[block_start:(block_start + self.block_size)])
+            blocks_writer.pad()
+
+        self.compressed = writer.getvalue() + blocks_writer.getvalue()
+        self.words = self.compressed
+        end = time.perf_counter()
+        self._add_timer('compression', end - start)
+
+    # Lecture de l'entête d'un bloc : nombre de bits idéal, maximum de bits, nombre d'overflow
+    # et position du premier entier
+    def _read_block_header(self, reader: BitReader, cursor: int) -> Tuple[int, int, int, int]:
+        best_bit_length = reader.read(cursor, self.meta_words_length)
+        cursor += self.meta_words_length
+        max_bit_length = reader.read(cursor, self.meta_words_length)
+        cursor += self.meta_words_length
+        total_overflow = reader.read(cursor, self.block_size.bit_length())
+        cursor += self.block_size.bit_length()
+        return best_bit_length, max_bit_length, total_overflow, cursor
+
+    # Ecriture d'un bloc : nombre de bits idéal, maximum de bits, nombre d'overflow,
+    # puis les entiers (ou positions) et les overflow comme pour la méthode crossing
+    def _write_block(self, writer: BitWriter, block: List[int]) -> int:
+        packer = BitPackerCrossing(block)
+        # Les blocs gardent le bit d'overflow : leur entête ne peut pas indiquer un dictionnaire
+        packer.dictionary = False
+        overflow_list = packer._get_overflow_list()
+        writer.write(packer.best_bit_length, self.meta_words_length)
+        writer.write(packer.max, self.meta_words_length)
+        writer.write(len(overflow_list), self.block_size.bit_length())
+
+        item_length = packer.best_bit_length + 1
+        overflow_flag = 1 << packer.best_bit_length
+        for number in block:
+            if number.bit_length() <= packer.best_bit_length:
+                writer.write(number, item_length)
             else:
-                if total_words < self.total_items:
-                    number_type = phrase[cursor:(cursor + 1)]
-                    cursor += 1
-                    # On teste si l'on est à l'emplacement de l'entier recherché
-                    if total_words == i:
-                        bits = phrase[cursor:(cursor + self.best_bit_length)]
-                        # On teste si l'entier est un overflow
-                        if number_type == '1':
-                            return self._bits_to_int(
-                                self._get_overflow(phrase, self._bits_to_int(bits))
-                            )
-                        else:
-                            return self._bits_to_int(bits)
-                    total_words += 1
-                    cursor += self.best_bit_length
-        raise 'Unable to get number'
-
-    def _get_overflow(self, phrase: str, position: int) -> str:
-        start = time.perf_counter()
-        cursor: int = (32 * 2) + (self.meta_words_length * 2)
-        total_words: int = 0
-        total_overflow: int = 0
-        while cursor < len(phrase):
-            char: str = phrase[cursor:(cursor + 1)]
-            cursor += 1
-            # On teste jusqu'à trouver le bit qui indique si la suite représente
-            # un entier ou une position
-            if char == '0':
+                writer.write(overflow_flag | overflow_list[number], item_length)
+        for number in overflow_list.keys():
+            writer.write(number, packer.max)
+        return len(overflow_list)
+
+    def uncompress(self, compressed_array: List[int]) -> List[int]:
+        start = time.perf_counter()
+        self.words = _to_words(compressed_array)
+        reader = BitReader(self.words, self.words_length)
+        self._read_meta(reader)
+        ints: List[int] = self._read_range(reader, 0, self.total_items)
+        end = time.perf_counter()
+        self._add_timer('decompression', end - start)
+        return ints
+
+    def get(self, i: int) -> int:
+        if not 0 <= i < self.total_items:
+            raise IndexError('Unable to get number')
+        start = time.perf_counter()
+        if self.cache is not None:
+            number = self._get_cached(i)
+        else:
+            number = self._read_range(BitReader(self.words, self.words_length), i, i + 1)[0]
+        end = time.perf_counter()
+        self._add_timer('reading_int', end - start)
+        return number
+
+    # Lecture des entiers de start à stop : les meta de chaque bloc ne sont lues qu'une fois
+    def _read_range(self, reader: BitReader, start: int, stop: int) -> List[int]:
+        ints: List[int] = []
+        while start < stop:
+            block = start // self.block_size
+            block_start = block * self.block_size
+            block_stop = min(block_start + self.block_size, self.total_items, stop)
+            # Tableau modifié : chaque bloc a ses propres mots et le dernier n'est pas compressé
+            if self.blocks is not None and block == len(self.blocks):
+                ints += self.tail[(start - block_start):(block_stop - block_start)]
+                start = block_stop
                 continue
+            if self.blocks is not None:
+                block_reader, cursor = BitReader(self.blocks[block], self.words_length), 0
             else:
-                # On teste si l'on est au niveau des entiers overflow
-                if total_words < self.total_items:
-                    total_words += 1
-                    cursor += self.best_bit_length + 1
+                block_reader, cursor = reader, reader.read((2 + block) * 32, 32) * self.words_length
+            best_bit_length, max_bit_length, _, cursor = self._read_block_header(block_reader, cursor)
+
+            item_length = best_bit_length + 1
+            overflow_flag = 1 << best_bit_length
+            block_items = min(self.block_size, self.total_items - block_start)
+            overflow_index_start = cursor + (block_items * item_length)
+            cursor += (start - block_start) * item_length
+            for _ in range(start, block_stop):
+                bits = block_reader.read(cursor, item_length)
+                cursor += item_length
+                # On teste si l'entier est un overflow
+                if bits & overflow_flag:
+                    overflow_position = overflow_index_start + ((bits ^ overflow_flag) * max_bit_length)
+                    ints.append(block_reader.read(overflow_position, max_bit_length))
                 else:
-                    # On teste si l'on est à la position de l'overflow
-                    if total_overflow == position:
-                        end = time.perf_counter()
-                        self._add_timer('reading_overflow', f"{end - start:.6f}")
-                        return phrase[cursor:(cursor + self.max)]
-                    else:
-                        total_overflow += 1
-                        cursor += self.max
-        raise 'Unable to get overflow number'
+                    ints.append(bits)
+            start = block_stop
+        return ints
+
+    def _get_sorted(self, reader: BitReader, indices: List[int]) -> dict[int, int]:
+        return {i: self._read_range(reader, i, i + 1)[0] for i in indices}
+
+    # Passage en tableau modifiable : les mots de chaque bloc complet sont séparés
+    # et les entiers du dernier bloc sont décodés
+    def _make_mutable(self) -> None:
+        if self.blocks is not None:
+            return
+        reader = BitReader(self._words, self.words_length)
+        blocks: List[List[int]] = []
+        for block in range(self.total_items // self.block_size):
+            offset = reader.read((2 + block) * 32, 32)
+            best_bit_length, max_bit_length, total_overflow, cursor = \
+                self._read_block_header(reader, offset * self.words_length)
+            end = cursor + (self.block_size * (best_bit_length + 1)) + (total_overflow * max_bit_length)
+            blocks.append(list(self._words[offset:math.ceil(end / self.words_length)]))
+        self.tail = self._read_range(reader, len(blocks) * self.block_size, self.total_items)
+        self.blocks = blocks
+        self.encoded_lengths = [len(words) for words in blocks]
+
+    # Mots d'un bloc compressé seul
+    def _encode_block(self, block: List[int]) -> List[int]:
+        writer = BitWriter(self.words_length)
+        self._write_block(writer, block)
+        return writer.getvalue()
+
+    # Reconstruction du tableau compressé : meta, répertoire, blocs puis le dernier bloc
+    def _assemble(self) -> None:
+        blocks = self.blocks + ([self._encode_block(self.tail)] if self.tail else [])
+        writer = BitWriter(self.words_length)
+        self._write_meta(writer)
+        offset = 2 + len(blocks)
+        for words in blocks:
+            writer.write(offset, 32)
+            offset += len(words)
+        words = writer.getvalue()
+        for block_words in blocks:
+            words += block_words
+        self._words = words
+        self._compressed = words
+        self._dirty = False
+
+    @staticmethod
+    def _check_number(number: int) -> None:
+        if number < 0:
+            raise ValueError("Integer is negative")
+        if number.bit_length() > 32:
+            raise ValueError("Integer is larger than 32 bits")
+
+    def _invalidate(self, i: int, number: int, appended: bool, reader: Optional[BitReader] = None) -> None:
+        super()._invalidate(i, number, appended, reader)
+        self._dirty = True
+
+    # Ajout d'entiers dans le dernier bloc, compressé une fois complet
+    def extend(self, numbers: Iterable[int]) -> None:
+        start = time.perf_counter()
+        self._make_mutable()
+        for number in numbers:
+            self._check_number(number)
+            self.tail.append(number)
+            self.total_items += 1
+            if len(self.tail) == self.block_size:
+                self.blocks.append(self._encode_block(self.tail))
+                self.encoded_lengths.append(len(self.blocks[-1]))
+                self.tail = []
+            self._invalidate(self.total_items - 1, number, True)
+        end = time.perf_counter()
+        self._add_timer('append', end - start)
+
+    def append(self, number: int) -> None:
+        self.extend([number])
+
+    # Modification d'un entier : il est écrit à sa place s'il tient sur le nombre de bits du bloc,
+    # sinon sa position est écrite et il est ajouté (s'il n'y est pas déjà) à la liste des overflow du bloc
+    def set(self, i: int, number: int) -> None:
+        if not 0 <= i < self.total_items:
+            raise IndexError('Unable to set number')
+        self._check_number(number)
+        start = time.perf_counter()
+        self._make_mutable()
+        block, k = divmod(i, self.block_size)
+        if block == len(self.blocks):
+            self.tail[k] = number
+        else:
+            self._set_in_block(block, k, number)
+        self._invalidate(i, number, False)
+        end = time.perf_counter()
+        self._add_timer('update', end - start)
+
+    def _set_in_block(self, block: int, k: int, number: int) -> None:
+        words = self.blocks[block]
+        reader = BitReader(words, self.words_length)
+        best_bit_length, max_bit_length, total_overflow, cursor = self._read_block_header(reader, 0)
+        item_length = best_bit_length + 1
+        overflow_flag = 1 << best_bit_length
+        position = cursor + (k * item_length)
+        overflow_index_start = cursor + (self.block_size * item_length)
+        if number.bit_length() <= best_bit_length:
+            _write_bits(words, position, number, item_length, self.words_length)
+            return
+        for overflow_position in range(total_overflow):
+            if reader.read(overflow_index_start + (overflow_position * max_bit_length), max_bit_length) == number:
+                _write_bits(words, position, overflow_flag | overflow_position, item_length, self.words_length)
+                return
+        # Nouvel overflow à la fin du bloc, si sa position et l'entier tiennent dans le bloc
+        if (number.bit_length() <= max_bit_length and total_overflow < overflow_flag
+                and total_overflow + 1 < (1 << self.block_size.bit_length())):
+            overflow_end = overflow_index_start + ((total_overflow + 1) * max_bit_length)
+            words.extend([0] * (math.ceil(overflow_end / self.words_length) - len(words)))
+            _write_bits(words, overflow_end - max_bit_length, number, max_bit_length, self.words_length)
+            _write_bits(words, self.meta_words_length * 2, total_overflow + 1, self.block_size.bit_length(),
+                        self.words_length)
+            _write_bits(words, position, overflow_flag | total_overflow, item_length, self.words_length)
+            if len(words) <= self.encoded_lengths[block] * (1 + self.compaction_threshold):
+                return
+        # Sinon, ou si les overflow ajoutés ont trop agrandi le bloc, il est recompressé
+        values = self._read_range(None, block * self.block_size, (block + 1) * self.block_size)
+        values[k] = number
+        self._compact_block(block, values)
+
+    def _compact_block(self, block: int, values: List[int]) -> None:
+        start = time.perf_counter()
+        self.blocks[block] = self._encode_block(values)
+        self.encoded_lengths[block] = len(self.blocks[block])
+        end = time.perf_counter()
+        self._add_timer('compaction', end - start)
+
+    # Recompression de tous les blocs (les overflow qui ne sont plus utilisés sont retirés)
+    def compact(self) -> None:
+        self._make_mutable()
+        for block in range(len(self.blocks)):
+            self._compact_block(block, self._read_range(None, block * self.block_size, (block + 1) * self.block_size))
+        self._dirty = True
+
+    def save(self, path: str) -> None:
+        if self._dirty:
+            self._assemble()
+        super().save(path)
+
+#####
+# BitPacker par dictionnaire pour les tableaux avec peu d'entiers distincts :
+# la liste triée des entiers distincts est écrite une seule fois et chaque entier est
+# remplacé par sa position dans cette liste, sur ceil(log2(nombre d'entiers distincts)) bits.
+# La méthode crossing passe d'elle-même à ce format lorsqu'il est plus court
+#####
+class BitPackerDictionary(BitPackerCrossing):
+    compress_type = 'dictionary'
+
+    def _find_best_bit_length(self):
+        start = time.perf_counter()
+        self.dictionary = True
+        self.best_bit_length = self._dictionary_bit_length(len(set(self.array)))
+        end = time.perf_counter()
+        self._add_timer('find_best_bit_length', end - start)
+
+# Transformations disponibles pour BitPackerTransform
+TRANSFORMS = ['delta', 'delta_of_delta', 'for']
+# Méthodes utilisables pour compresser les différences (leur position est écrite dans les meta)
+TRANSFORM_COMPRESS_TYPES = ['crossing', 'nocrossing', 'blocked', 'dictionary', 'wide', 'raw', 'auto']
+
+# Encodage "zigzag" : les entiers signés sont écrits 0, -1, 1, -2, 2...
+def zigzag(number: int) -> int:
+    return number << 1 if number >= 0 else ((-number) << 1) - 1
+
+def unzigzag(number: int) -> int:
+    return (number >> 1) ^ -(number & 1)
+
+#####
+# BitPacker "wide" pour les entiers signés et les entiers jusqu'à 64 bits :
+# - les entiers négatifs sont encodés en zigzag (-1 -> 1, 1 -> 2, -2 -> 3...)
+# - le nombre de bits idéal et le maximum sont écrits sur 7 bits et les overflows sur
+#   64 bits au plus : un seul grand entier ne change pas la taille des autres
+# - un bit des meta (après le maximum) indique si les entiers sont signés
+#####
+class BitPackerWide(BitPackerCrossing):
+    compress_type = 'wide'
+    integer_length = 64
+
+    def __init__(self, array: List[int] = []):
+        self.signed = any(number < 0 for number in array)
+        if self.signed:
+            array = [zigzag(number) for number in array]
+        super().__init__(array)
+
+    @property
+    def typecode(self) -> str:
+        return 'q' if self.signed else 'Q'
+
+    def _meta_length(self) -> int:
+        return super()._meta_length() + 1
+
+    def _read_meta(self, reader: BitReader) -> int:
+        start = time.perf_counter()
+        cursor: int = 0
+        self.total_items = reader.read(cursor, 32)
+        cursor += 32
+        self.best_bit_length = reader.read(cursor, self.meta_words_length)
+        cursor += self.meta_words_length
+        self.max = reader.read(cursor, self.meta_words_length)
+        cursor += self.meta_words_length
+        self.signed = bool(reader.read(cursor, 1))
+        cursor += 1
+        cursor = self._read_total_overflow(reader, cursor)
+        self.dictionary = self.best_bit_length == 0
+        if self.dictionary:
+            self.best_bit_length = self._dictionary_bit_length(self.total_overflow)
+        end = time.perf_counter()
+        self._add_timer('read_meta', end - start)
+        return cursor
+
+    def _write_meta(self, writer: BitWriter) -> None:
+        super()._write_meta(writer)
+        writer.write(int(self.signed), 1)
+
+    def _read_range(self, reader: BitReader, start: int, stop: int) -> List[int]:
+        ints = super()._read_range(reader, start, stop)
+        if self.signed:
+            return [unzigzag(number) for number in ints]
+        return ints
+
+    # Les entiers en zigzag ne sont pas comparables : les requêtes décodent les entiers signés
+    def _read_codes(self, reader: BitReader, start: int, stop: int) -> Tuple[List[int], List[int]]:
+        if self.signed:
+            return self._read_range(reader, start, stop), []
+        return super()._read_codes(reader, start, stop)
+
+    def _zone_source(self) -> Sequence[int]:
+        if self.signed:
+            return [unzigzag(number) for number in self.array]
+        return self.array
+
+    def _zone_code(self, number: int) -> int:
+        return zigzag(number) if self.signed else number
+
+    # Les entiers signés sont modifiés sous leur forme zigzag
+    def set(self, i: int, number: int) -> None:
+        super().set(i, zigzag(number) if self.signed else number)
+
+    def _zone_number(self, code: int) -> int:
+        return unzigzag(code) if self.signed else code
+
+#####
+# BitPacker avec transformation préalable pour les tableaux triés ou les séries temporelles :
+# - delta : différence avec l'entier précédent
+# - delta_of_delta : différence entre deux deltas successifs
+# - for (frame of reference) : différence avec le minimum du bloc
+# Les différences (en zigzag) sont compressées avec la méthode choisie, et une ancre
+# (premier entier, premier delta ou minimum) est enregistrée tous les anchor_step entiers
+# afin de garder l'accès direct avec get.
+# Sans méthode ni transformation (None), elles sont lues dans les meta à la décompression
+#####
+class BitPackerTransform(BaseBitPacker):
+    compress_type = 'transform'
+
+    def __init__(self, array: List[int] = [], compress_type: Optional[str] = 'crossing',
+                 transform: Optional[str] = 'delta'):
+        if transform is not None and transform not in TRANSFORMS:
+            raise ValueError("Unknown transform")
+        if compress_type is not None and compress_type not in TRANSFORM_COMPRESS_TYPES:
+            raise ValueError("Unknown compress type")
+        super().__init__(array)
+        self.inner_compress_type = compress_type
+        self.transform = transform
+        self.anchor_step = 128
+        self.anchors = BitPackerCrossing([])
+        self.residuals = bit_packer_factory(compress_type or 'crossing', [])
+
+    # Le nombre de bits idéal est celui des différences, calculé lors de la compression
+    def _find_best_bit_length(self):
+        pass
+
+    # Meta : nombre total d'entiers, transformation, pas des ancres, méthode des différences
+    # (suivies du nombre de mots des ancres). Un tableau compressé avec une autre méthode ou
+    # une autre transformation que celles du packer n'est pas décompressé
+    def _read_meta(self, reader: BitReader) -> int:
+        start = time.perf_counter()
+        self.total_items = reader.read(0, 32)
+        transform = reader.read(32, 32)
+        self.anchor_step = reader.read(64, 32)
+        compress_type = reader.read(96, 32)
+        if transform >= len(TRANSFORMS) or compress_type >= len(TRANSFORM_COMPRESS_TYPES) or not self.anchor_step:
+            raise ValueError("Not a transformed array")
+        transform = TRANSFORMS[transform]
+        compress_type = TRANSFORM_COMPRESS_TYPES[compress_type]
+        if self.transform not in (None, transform) or self.inner_compress_type not in (None, compress_type):
+            raise ValueError(f"Array was compressed with {compress_type} and {transform}, "
+                             f"not {self.inner_compress_type} and {self.transform}")
+        self.transform = transform
+        self.inner_compress_type = compress_type
+        end = time.perf_counter()
+        self._add_timer('read_meta', end - start)
+        return 128
+
+    def _write_meta(self, writer: BitWriter) -> None:
+        start = time.perf_counter()
+        writer.write(self.total_items, 32)
+        writer.write(TRANSFORMS.index(self.transform), 32)
+        writer.write(self.anchor_step, 32)
+        writer.write(TRANSFORM_COMPRESS_TYPES.index(self.inner_compress_type), 32)
+        end = time.perf_counter()
+        self._add_timer('writing_meta', end - start)
+
+    def compress(self):
+        if not len(self.array):
+            raise ValueError("no array has been given, cannot compress")
+        if self.transform is None or self.inner_compress_type is None:
+            raise ValueError("transform and compress type are needed to compress")
+        start = time.perf_counter()
+        anchors: List[int] = []
+        residuals: List[int] = []
+        for block_start in range(0, self.total_items, self.anchor_step):
+            block = self.array[block_start:(block_start + self.anchor_step)]
+            if self.transform == 'for':
+                anchors.append(min(block))
+                residuals += [number - anchors[-1] for number in block]
+            elif self.transform == 'delta':
+                anchors.append(block[0])
+                residuals += [0] + [zigzag(block[k] - block[k - 1]) for k in range(1, len(block))]
+            else:
+                deltas = [block[k] - block[k - 1] for k in range(1, len(block))] or [0]
+                anchors += [block[0], zigzag(deltas[0])]
+                residuals += [0, 0][:len(block)] + [zigzag(deltas[k] - deltas[k - 1]) for k in range(1, len(deltas))]
+
+        self.anchors = BitPackerCrossing(anchors)
+        self.anchors.compress()
+        self.residuals = bit_packer_factory(self.inner_compress_type, residuals)
+        self.residuals.compress()
+        self.best_bit_length = self.residuals.best_bit_length
+        self.total_overflow = self.residuals.total_overflow
+
+        writer = BitWriter(self.words_length)
+        self._write_meta(writer)
+        writer.write(len(self.anchors.compressed), 32)
+        self.compressed = writer.getvalue() + list(self.anchors.compressed) + list(self.residuals.compressed)
+        self.words = self.compressed
+        end = time.perf_counter()
+        self._add_timer('compression', end - start)
+
+    def uncompress(self, compressed_array: List[int]) -> List[int]:
+        start = time.perf_counter()
+        self.words = _to_words(compressed_array)
+        self._read_mapped()
+        ints: List[int] = self._read_range(None, 0, self.total_items)
+        end = time.perf_counter()
+        self._add_timer('decompression', end - start)
+        return ints
+
+    # Meta, puis ancres et différences lues dans leurs propres tableaux compressés
+    def _read_mapped(self) -> None:
+        cursor = self._read_meta(BitReader(self.words, self.words_length)) // self.words_length
+        anchors_length = self.words[cursor]
+        cursor += 1
+        self.anchors = BitPackerCrossing([])
+        self.anchors.uncompress(self.words[cursor:(cursor + anchors_length)])
+        self.residuals = bit_packer_factory(self.inner_compress_type, [])
+        self.residuals.uncompress(self.words[(cursor + anchors_length):])
+        self.best_bit_length = self.residuals.best_bit_length
+        self.total_overflow = self.residuals.total_overflow
+
+    def get(self, i: int) -> int:
+        if not 0 <= i < self.total_items:
+            raise IndexError('Unable to get number')
+        start = time.perf_counter()
+        if self.cache is not None:
+            number = self._get_cached(i)
+        else:
+            number = self._read_range(None, i, i + 1)[0]
+        end = time.perf_counter()
+        self._add_timer('reading_int', end - start)
+        return number
+
+    # Lecture des entiers de start à stop à partir de l'ancre de chaque bloc
+    # (les ancres et les différences sont lues dans leurs propres tableaux compressés)
+    def _read_range(self, reader: Optional[BitReader], start: int, stop: int) -> List[int]:
+        ints: List[int] = []
+        while start < stop:
+            block = start // self.anchor_step
+            block_start = block * self.anchor_step
+            block_stop = min(block_start + self.anchor_step, stop)
+            if self.transform == 'for':
+                anchor = self.anchors.get(block)
+                ints += [anchor + residual for residual in self.residuals.slice(start, block_stop)]
+            elif self.transform == 'delta':
+                # Les différences doivent être additionnées depuis le début du bloc
+                number = self.anchors.get(block)
+                residuals = self.residuals.slice(block_start, block_stop)
+                for k in range(len(residuals)):
+                    number += unzigzag(residuals[k])
+                    if block_start + k >= start:
+                        ints.append(number)
+            else:
+                number = self.anchors.get(block * 2)
+                delta = unzigzag(self.anchors.get((block * 2) + 1))
+                residuals = self.residuals.slice(block_start, block_stop)
+                for k in range(len(residuals)):
+                    if k > 1:
+                        delta += unzigzag(residuals[k])
+                    if k > 0:
+                        number += delta
+                    if block_start + k >= start:
+                        ints.append(number)
+            start = block_stop
+        return ints
+
+    def _get_sorted(self, reader: BitReader, indices: List[int]) -> dict[int, int]:
+        return {i: self._read_range(reader, i, i + 1)[0] for i in indices}
+
+# Puissances de 2 utilisées pour calculer le nombre de bits des entiers avec NumPy
+_POWERS_OF_TWO = np.array([1 << i for i in range(64)], dtype=np.uint64) if np is not None else None
+
+#####
+# BitPacker "crossing" vectorisé avec NumPy : même format que BitPackerCrossing,
+# mais chaque étape est calculée sur le tableau entier (entrée et sortie en np.uint32)
+#####
+class BitPackerCrossingNumpy(BitPackerCrossing):
+    def __init__(self, array: List[int] = []):
+        array = np.asarray(array)
+        if array.dtype != np.uint32:
+            if array.size and array.min() < 0:
+                raise ValueError("Integer is negative")
+            if array.size and array.max() > 0xFFFFFFFF:
+                raise ValueError("Integer is larger than 32 bits")
+            array = array.astype(np.uint32)
+        # Mots compressés en np.uint64, suivis d'un mot vide pour les lectures à cheval
+        self._packed = np.zeros(1, dtype=np.uint64)
+        super().__init__(array)
+
+    def _set_array_bit_lengths(self):
+        # Le nombre de bits d'un entier est le nombre de puissances de 2 inférieures ou égales
+        self.lengths = np.searchsorted(_POWERS_OF_TWO, self.array, side='right').astype(np.uint8)
+
+    def _set_array_max_bit_length(self):
+        if not len(self.lengths):
+            self._set_array_bit_lengths()
+        self.max = int(self.lengths.max())
+
+    def _bit_length_histogram(self) -> List[int]:
+        distinct = np.unique(self.array)
+        distinct_lengths = np.searchsorted(_POWERS_OF_TWO, distinct, side='right')
+        return np.bincount(distinct_lengths, minlength=self.max + 1).tolist()
+
+    # Masque des overflows, position de chaque overflow dans la liste des overflows
+    # uniques (dans l'ordre d'apparition) et liste des overflows uniques
+    def _get_overflow_positions(self):
+        start = time.perf_counter()
+        if self.dictionary:
+            # Le dictionnaire contient tous les entiers distincts, triés comme avec np.unique
+            overflow_mask = np.ones(len(self.array), dtype=bool)
+        else:
+            overflow_mask = self.lengths > self.best_bit_length
+        overflows = self.array[overflow_mask]
+        distinct, first_index, inverse = np.unique(overflows, return_index=True, return_inverse=True)
+        if self.dictionary:
+            end = time.perf_counter()
+            self._add_timer('overflow_list', end - start)
+            return overflow_mask, inverse.reshape(-1), distinct
+        # np.unique trie les valeurs : on les replace dans leur ordre d'apparition
+        order = np.argsort(first_index, kind='stable')
+        rank = np.empty_like(order)
+        rank[order] = np.arange(len(order))
+        end = time.perf_counter()
+        self._add_timer('overflow_list', end - start)
+        return overflow_mask, rank[inverse.reshape(-1)], distinct[order]
+
+    # Ecrit des valeurs de "length" bits (length <= 33) aux positions données
+    @staticmethod
+    def _pack(words, positions, values, length: int) -> None:
+        index = positions >> np.uint64(5)
+        end = (positions & np.uint64(31)) + np.uint64(length)
+        # Chaque valeur s'étend au plus sur deux mots : on la cale dans une fenêtre de 64 bits
+        shifted = values.astype(np.uint64) << (np.uint64(64) - end)
+        np.bitwise_or.at(words, index, shifted >> np.uint64(32))
+        np.bitwise_or.at(words, index + np.uint64(1), shifted & np.uint64(0xFFFFFFFF))
+
+    # Lit des valeurs de "length" bits (length <= 33) aux positions données
+    @staticmethod
+    def _unpack(words, positions, length: int):
+        index = positions >> np.uint64(5)
+        end = (positions & np.uint64(31)) + np.uint64(length)
+        window = (words[index] << np.uint64(32)) | words[index + np.uint64(1)]
+        return (window >> (np.uint64(64) - end)) & np.uint64((1 << length) - 1)
+
+    def _compute_zones(self, numbers: Sequence[int]) -> List[Tuple[int, int]]:
+        starts = np.arange(0, len(numbers), self.zone_size)
+        return list(zip(np.minimum.reduceat(numbers, starts).tolist(), np.maximum.reduceat(numbers, starts).tolist()))
+
+    # zone_map ajoute le minimum et le maximum de chaque zone à la fin du tableau compressé
+    def compress(self, zone_map: bool = False):
+        if not len(self.array):
+            raise ValueError("no array has been given, cannot compress")
+        start = time.perf_counter()
+        overflow_mask, overflow_positions, overflow_list = self._get_overflow_positions()
+        self.total_overflow = len(overflow_list)
+
+        # On écrit les métadonnées
+        writer = BitWriter(self.words_length)
+        self._write_meta(writer)
+        self._write_total_overflow(writer, zone_map)
+        meta_length = len(writer)
+        meta = np.array(writer.getvalue(), dtype=np.uint64)
+
+        # Avec un dictionnaire, il n'y a pas de bit d'overflow
+        item_length = self.best_bit_length + (0 if self.dictionary else 1)
+        overflow_index_start = meta_length + (self.total_items * item_length)
+        total_length = overflow_index_start + (self.total_overflow * self.max)
+        # Un mot supplémentaire reçoit les bits débordant du dernier mot
+        words = np.zeros(math.ceil(total_length / 32) + 1, dtype=np.uint64)
+        words[:len(meta)] = meta
+
+        # On écrit soit l'entier, soit la position de l'overflow précédée du bit d'overflow
+        if self.dictionary:
+            codes = overflow_positions.astype(np.uint64)
+        else:
+            codes = self.array.astype(np.uint64)
+            codes[overflow_mask] = overflow_positions.astype(np.uint64) | np.uint64(1 << self.best_bit_length)
+        positions = np.uint64(meta_length) + np.arange(self.total_items, dtype=np.uint64) * np.uint64(item_length)
+        self._pack(words, positions, codes, item_length)
+
+        # On ajoute les overflow
+        positions = (np.uint64(overflow_index_start) +
+                     np.arange(self.total_overflow, dtype=np.uint64) * np.uint64(self.max))
+        self._pack(words, positions, overflow_list, self.max)
+
+        self._packed = words
+        compressed = words[:-1].astype(np.uint32)
+        zones = self._compute_zones(self.array) if zone_map else []
+        if zone_map:
+            writer = BitWriter(self.words_length)
+            self._write_zone_map(writer, zones)
+            compressed = np.concatenate((compressed, np.array(writer.getvalue(), dtype=np.uint32)))
+        self.compressed = compressed
+        self.words = self.compressed.tolist()
+        self.zones = zones
+        self.zone_map = zone_map
+        end = time.perf_counter()
+        self._add_timer('compression', end - start)
+
+    def uncompress(self, compressed_array: List[int]) -> List[int]:
+        start = time.perf_counter()
+        self._packed = np.zeros(len(compressed_array) + 1, dtype=np.uint64)
+        self._packed[:-1] = compressed_array
+        self.words = self._packed[:-1].tolist()
+        self.compressed = self._packed[:-1].astype(np.uint32)
+        self._read_meta(BitReader(self.words, self.words_length))
+        ints = self._read_items(np.arange(self.total_items, dtype=np.uint64))
+        end = time.perf_counter()
+        self._add_timer('decompression', end - start)
+        return ints
+
+    # Les mots modifiés par set sont aussi écrits dans compressed et dans les mots np.uint64 (_packed)
+    def _make_writable(self) -> None:
+        if not isinstance(self.words, list):
+            raise ValueError("a mapped array cannot be modified")
+
+    def _update_bits(self, position: int, value: int, length: int) -> None:
+        super()._update_bits(position, value, length)
+        first = position // self.words_length
+        last = math.ceil((position + length) / self.words_length)
+        if last > len(self.compressed):
+            self.compressed = np.concatenate((self.compressed, np.zeros(last - len(self.compressed), dtype=np.uint32)))
+        if last >= len(self._packed):
+            self._packed = np.concatenate((self._packed, np.zeros(last + 1 - len(self._packed), dtype=np.uint64)))
+        self.compressed[first:last] = self.words[first:last]
+        self._packed[first:last] = self.words[first:last]
+
+    def get_many(self, indices: Iterable[int]):
+        start = time.perf_counter()
+        indices = np.asarray(indices, dtype=np.int64).reshape(-1)
+        if len(indices) and (indices.min() < 0 or indices.max() >= self.total_items):
+            raise IndexError('Unable to get number')
+        ints = self._read_items(indices.astype(np.uint64))
+        end = time.perf_counter()
+        self._add_timer('reading_many', end - start)
+        return ints
+
+    def slice(self, start: int, stop: int):
+        timer_start = time.perf_counter()
+        start, stop, _ = slice(start, stop).indices(self.total_items)
+        ints = self._read_items(np.arange(start, max(start, stop), dtype=np.uint64))
+        timer_end = time.perf_counter()
+        self._add_timer('reading_slice', timer_end - timer_start)
+        return ints
+
+    # Lecture vectorisée des entiers aux positions données
+    def _read_items(self, indices):
+        meta_length = self._meta_length()
+        item_length = self.best_bit_length + (0 if self.dictionary else 1)
+        overflow_index_start = meta_length + (self.total_items * item_length)
+        positions = np.uint64(meta_length) + indices * np.uint64(item_length)
+        codes = self._unpack(self._packed, positions, item_length)
+        if self.dictionary:
+            positions = np.uint64(overflow_index_start) + codes * np.uint64(self.max)
+            return self._unpack(self._packed, positions, self.max).astype(np.uint32)
+
+        # On remplace les positions par les overflow correspondants
+        overflow_flag = np.uint64(1 << self.best_bit_length)
+        overflow_mask = (codes & overflow_flag) != 0
+        positions = np.uint64(overflow_index_start) + (codes[overflow_mask] ^ overflow_flag) * np.uint64(self.max)
+        codes[overflow_mask] = self._unpack(self._packed, positions, self.max)
+        return codes.astype(np.uint32)
+
+#####
+# Tableau non compressé : le nombre d'entiers suivi des entiers sur 32 bits
+# (utilisé par la sélection automatique lorsque compresser ne fait pas gagner de temps)
+#####
+class BitPackerRaw(BaseBitPacker):
+    compress_type = 'raw'
+
+    def _find_best_bit_length(self):
+        pass
+
+    def _read_meta(self, reader: BitReader) -> int:
+        start = time.perf_counter()
+        self.total_items = reader.read(0, 32)
+        self.best_bit_length = self.max = 32
+        end = time.perf_counter()
+        self._add_timer('read_meta', end - start)
+        return 32
+
+    def compress(self):
+        if not len(self.array):
+            raise ValueError("no array has been given, cannot compress")
+        start = time.perf_counter()
+        if min(self.array) < 0:
+            raise ValueError("Integer is negative")
+        if self.max > 32:
+            raise ValueError("Integer is larger than 32 bits")
+        self.compressed = [self.total_items] + list(self.array)
+        self.words = self.compressed
+        end = time.perf_counter()
+        self._add_timer('compression', end - start)
+
+    def uncompress(self, compressed_array: List[int]) -> List[int]:
+        start = time.perf_counter()
+        self.words = _to_words(compressed_array)
+        self._read_meta(BitReader(self.words, self.words_length))
+        ints: List[int] = self.words[1:(self.total_items + 1)]
+        end = time.perf_counter()
+        self._add_timer('decompression', end - start)
+        return ints
+
+    def get(self, i: int) -> int:
+        if not 0 <= i < self.total_items:
+            raise IndexError('Unable to get number')
+        return self.words[i + 1]
+
+    def _read_range(self, reader: BitReader, start: int, stop: int) -> List[int]:
+        return list(self.words[(start + 1):(stop + 1)])
+
+    def _get_sorted(self, reader: BitReader, indices: List[int]) -> dict[int, int]:
+        return {i: self.words[i + 1] for i in indices}
+
+####
+# Sélection automatique de la méthode
+# - Le débit de compression et de décompression de chaque méthode est mesuré une fois
+#   par machine (calibrate) et enregistré dans CALIBRATION_PATH
+# - La taille du tableau compressé est estimée en compressant un échantillon
+# - La méthode choisie est celle dont le temps total (compression, envoi sur le réseau
+#   avec bandwidth octets/s et latency secondes, décompression) est le plus court
+####
+AUTO_COMPRESS_TYPES = ['crossing', 'nocrossing', 'raw']
+# Nombre de bits maximum des entiers que chaque méthode sait écrire
+AUTO_MAX_BIT_LENGTHS = {'crossing': 32, 'nocrossing': 30, 'raw': 32}
+CALIBRATION_PATH = os.path.join(os.path.expanduser('~'), '.cache', 'bitpacker', 'calibration.json')
+
+def _machine() -> dict[str, str]:
+    return {'node': platform.node(), 'machine': platform.machine(), 'python': platform.python_version()}
+
+# Mesure du débit (entiers par seconde) de chaque méthode ; le résultat est enregistré
+# dans path (sauf si path vaut None)
+def calibrate(path: Optional[str] = CALIBRATION_PATH, size: int = 1 << 14) -> dict[str, dict[str, float]]:
+    generator = random.Random(0)
+    numbers = [generator.randint(0, 9999) if generator.random() < 0.9 else generator.randint(0, (1 << 24) - 1)
+               for _ in range(size)]
+    speeds: dict[str, dict[str, float]] = {}
+    for compress_type in AUTO_COMPRESS_TYPES:
+        start = time.perf_counter()
+        packer = bit_packer_factory(compress_type, numbers)
+        packer.compress()
+        middle = time.perf_counter()
+        bit_packer_factory(compress_type, []).uncompress(packer.compressed)
+        end = time.perf_counter()
+        speeds[compress_type] = {'compression': size / max(middle - start, 1e-9),
+                                 'decompression': size / max(end - middle, 1e-9)}
+    if path is not None:
+        try:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            with open(path, 'w') as file:
+                json.dump({'machine': _machine(), 'speeds': speeds}, file, indent=2)
+        except OSError:
+            pass
+    return speeds
+
+# Débits enregistrés pour cette machine, mesurés à nouveau s'ils n'existent pas encore
+def load_calibration(path: str = CALIBRATION_PATH) -> dict[str, dict[str, float]]:
+    try:
+        with open(path) as file:
+            calibration = json.load(file)
+        if calibration.get('machine') == _machine() and set(calibration['speeds']) >= set(AUTO_COMPRESS_TYPES):
+            return calibration['speeds']
+    except (OSError, ValueError, KeyError):
+        pass
+    return calibrate(path)
+
+# Estimation, pour chaque méthode, du nombre de mots compressés et des temps (en secondes)
+# de compression, d'envoi et de décompression à partir d'un échantillon de sample_size entiers
+# (le total tient compte de l'envoi en chunks trames, voir transfer_time)
+def estimate_costs(numbers: Sequence[int], bandwidth: float, latency: float,
+                   speeds: Optional[dict[str, dict[str, float]]] = None,
+                   sample_size: int = 4096, chunks: int = 1,
+                   compress_types: Sequence[str] = AUTO_COMPRESS_TYPES) -> dict[str, dict[str, float]]:
+    if not len(numbers):
+        raise ValueError("no array has been given, cannot estimate")
+    if speeds is None:
+        speeds = load_calibration()
+    # Echantillon régulier : les tableaux triés ou par paliers restent représentés
+    sample = list(numbers[::max(1, len(numbers) // sample_size)])
+    estimates: dict[str, dict[str, float]] = {}
+    for compress_type in compress_types:
+        packer = bit_packer_factory(compress_type, sample)
+        try:
+            packer.compress()
+        except ValueError:
+            continue
+        words = len(packer.compressed) * len(numbers) / len(sample)
+        compression = len(numbers) / speeds[compress_type]['compression']
+        transfer = latency + (words * 4) / bandwidth
+        decompression = len(numbers) / speeds[compress_type]['decompression']
+        total = transfer_time(compression, words * 4, decompression, bandwidth, latency, chunks)
+        estimates[compress_type] = {'words': words, 'compression': compression, 'transfer': transfer,
+                                    'decompression': decompression, 'total': total}
+    if not estimates:
+        raise ValueError("no compress type can encode this array")
+    return estimates
+
+#####
+# BitPacker choisissant la méthode avec estimate_costs : le tableau compressé
+# commence par le nombre d'entiers et la méthode choisie (position dans FILE_COMPRESS_TYPES)
+#####
+class BitPackerAuto(BaseBitPacker):
+    compress_type = 'auto'
+
+    def __init__(self, array: List[int] = [], bandwidth: float = 12.5e6, latency: float = 0.001,
+                 speeds: Optional[dict[str, dict[str, float]]] = None, chunks: int = 1):
+        super().__init__(array)
+        self.bandwidth = bandwidth
+        self.latency = latency
+        self.estimates: dict[str, dict[str, float]] = {}
+        self.selected_compress_type = 'crossing'
+        self.packer = BitPackerCrossing([])
+        if len(array) > 0:
+            start = time.perf_counter()
+            # L'échantillon ne contient pas forcément le plus grand entier : les méthodes
+            # qui ne savent pas écrire le tableau entier sont écartées avant l'estimation
+            compress_types = [] if min(array) < 0 else [compress_type for compress_type in AUTO_COMPRESS_TYPES
+                                                        if self.max <= AUTO_MAX_BIT_LENGTHS[compress_type]]
+            self.estimates = estimate_costs(array, bandwidth, latency, speeds, chunks=chunks,
+                                            compress_types=compress_types)
+            self.selected_compress_type = min(self.estimates, key=lambda key: self.estimates[key]['total'])
+            end = time.perf_counter()
+            self._add_timer('select_compress_type', end - start)
+
+    # Le nombre de bits idéal est celui de la méthode choisie
+    def _find_best_bit_length(self):
+        pass
+
+    def _read_meta(self, reader: BitReader) -> int:
+        start = time.perf_counter()
+        self.total_items = reader.read(0, 32)
+        self.selected_compress_type = FILE_COMPRESS_TYPES[reader.read(32, 32)]
+        end = time.perf_counter()
+        self._add_timer('read_meta', end - start)
+        return 64
+
+    def _write_meta(self, writer: BitWriter) -> None:
+        start = time.perf_counter()
+        writer.write(self.total_items, 32)
+        writer.write(FILE_COMPRESS_TYPES.index(self.selected_compress_type), 32)
+        end = time.perf_counter()
+        self._add_timer('writing_meta', end - start)
+
+    def compress(self):
+        if not len(self.array):
+            raise ValueError("no array has been given, cannot compress")
+        start = time.perf_counter()
+        self.packer = bit_packer_factory(self.selected_compress_type, self.array)
+        self.packer.compress()
+        self.best_bit_length = self.packer.best_bit_length
+        self.total_overflow = self.packer.total_overflow
+        writer = BitWriter(self.words_length)
+        self._write_meta(writer)
+        self.compressed = writer.getvalue() + list(self.packer.compressed)
+        self.words = self.compressed
+        end = time.perf_counter()
+        self._add_timer('compression', end - start)
+
+    def uncompress(self, compressed_array: List[int]) -> List[int]:
+        start = time.perf_counter()
+        self.words = _to_words(compressed_array)
+        cursor = self._read_meta(BitReader(self.words, self.words_length)) // self.words_length
+        self.packer = bit_packer_factory(self.selected_compress_type, [])
+        ints: List[int] = self.packer.uncompress(self.words[cursor:])
+        self.best_bit_length = self.packer.best_bit_length
+        self.total_overflow = self.packer.total_overflow
+        end = time.perf_counter()
+        self._add_timer('decompression', end - start)
+        return ints
+
+    def get(self, i: int) -> int:
+        return self.packer.get(i)
+
+    def _read_range(self, reader: BitReader, start: int, stop: int) -> List[int]:
+        return self.packer.slice(start, stop).tolist()
+
+    def _get_sorted(self, reader: BitReader, indices: List[int]) -> dict[int, int]:
+        return dict(zip(indices, self.packer.get_many(indices)))
+
+    # Le fichier enregistré est celui de la méthode choisie
+    def save(self, path: str) -> None:
+        self.packer.save(path)
 
 ####
 # BitPacker Factory
 # - Retourne la class BitPacker correspondant à la méthode choisie
+# - backend='numpy' utilise la version vectorisée si NumPy est installé
+# - transform applique une transformation (delta, delta_of_delta, for) avant la compression,
+#   'transform' décompresse un tableau transformé dont la méthode et la transformation sont lues dans ses meta
+# - bandwidth (octets/s) et latency (s) servent à la sélection automatique ('auto')
 ####
-def bit_packer_factory(compress_type: str, array: List[int]):
+def bit_packer_factory(compress_type: str, array: List[int], backend: str = 'python',
+                       transform: Optional[str] = None, bandwidth: float = 12.5e6, latency: float = 0.001):
+    if backend not in ('python', 'numpy'):
+        raise ValueError("Unknown backend")
+    if transform is not None:
+        return BitPackerTransform(array, compress_type, transform)
     if compress_type == 'crossing':
+        if backend == 'numpy' and np is not None:
+            return BitPackerCrossingNumpy(array)
         return BitPackerCrossing(array)
     elif compress_type == 'nocrossing':
         return BitPackerNoCrossing(array)
+    elif compress_type == 'blocked':
+        return BitPackerBlocked(array)
+    elif compress_type == 'dictionary':
+        return BitPackerDictionary(array)
+    elif compress_type == 'wide':
+        return BitPackerWide(array)
+    elif compress_type == 'raw':
+        return BitPackerRaw(array)
+    elif compress_type == 'auto':
+        return BitPackerAuto(array, bandwidth, latency)
+    elif compress_type == 'transform':
+        return BitPackerTransform(array, None, None)
     else:
-        raise "Unknown compress type"
+        raise ValueError("Unknown compress type")
+
+####
+# Compression en flux
+# - Le flux d'entiers est découpé en blocs de block_size entiers
+# - Chaque bloc devient une trame indépendante : le nombre de mots de la trame
+#   suivi des mots compressés (avec leurs propres meta et nombre de bits idéal)
+####
+def compress_stream(numbers: Iterable[int], compress_type: str = 'crossing',
+                    block_size: int = 65536) -> Iterator[List[int]]:
+    if block_size <= 0:
+        raise ValueError("block_size must be positive")
+    numbers = iter(numbers)
+    block: List[int] = list(islice(numbers, block_size))
+    while block:
+        packer = bit_packer_factory(compress_type, block)
+        packer.compress()
+        yield [len(packer.compressed)] + list(packer.compressed)
+        block = list(islice(numbers, block_size))
+
+# Décompression en flux : les entiers sont retournés trame par trame
+def uncompress_stream(words: Iterable[int], compress_type: str = 'crossing') -> Iterator[int]:
+    words = iter(words)
+    for length in words:
+        frame: List[int] = list(islice(words, length))
+        if len(frame) < length:
+            raise ValueError("Truncated frame")
+        yield from bit_packer_factory(compress_type, []).uncompress(frame)
+
+####
+# Envoi en flux avec asyncio
+# - Les trames de compress_stream sont écrites en little-endian sur un asyncio.StreamWriter,
+#   une trame vide (un seul mot à 0) marque la fin de l'envoi
+# - La trame suivante est compressée dans un executor pendant l'envoi de la précédente,
+#   et chaque trame reçue est décompressée pendant la lecture de la suivante
+# - executor peut être un ProcessPoolExecutor pour compresser sur un autre processeur
+####
+def _compress_frame(compress_type: str, block: List[int]) -> bytes:
+    packer = bit_packer_factory(compress_type, block)
+    packer.compress()
+    return _to_little_endian(array('I', [len(packer.compressed)] + list(packer.compressed)))
+
+def _uncompress_frame(compress_type: str, words: array) -> List[int]:
+    return bit_packer_factory(compress_type, []).uncompress(words)
+
+async def send_frames(writer: asyncio.StreamWriter, numbers: Iterable[int], compress_type: str = 'crossing',
+                      block_size: int = 65536, executor=None) -> int:
+    if block_size <= 0:
+        raise ValueError("block_size must be positive")
+    loop = asyncio.get_running_loop()
+    numbers = iter(numbers)
+    total_frames = 0
+    block: List[int] = list(islice(numbers, block_size))
+    frame = loop.run_in_executor(executor, _compress_frame, compress_type, block) if block else None
+    while frame is not None:
+        data = await frame
+        block = list(islice(numbers, block_size))
+        frame = loop.run_in_executor(executor, _compress_frame, compress_type, block) if block else None
+        writer.write(data)
+        await writer.drain()
+        total_frames += 1
+    writer.write(_to_little_endian(array('I', [0])))
+    await writer.drain()
+    return total_frames
+
+# Lecture d'une trame : None à la fin de l'envoi
+async def _read_frame(reader: asyncio.StreamReader) -> Optional[array]:
+    try:
+        length = struct.unpack('<I', await reader.readexactly(4))[0]
+        if length == 0:
+            return None
+        words = array('I')
+        words.frombytes(await reader.readexactly(length * 4))
+    except asyncio.IncompleteReadError:
+        raise ValueError("Truncated frame")
+    if sys.byteorder != 'little':
+        words.byteswap()
+    return words
+
+# Réception des trames : les entiers sont retournés trame par trame
+async def receive_frames(reader: asyncio.StreamReader, compress_type: str = 'crossing',
+                         executor=None) -> AsyncIterator[List[int]]:
+    loop = asyncio.get_running_loop()
+    words = await _read_frame(reader)
+    while words is not None:
+        ints = loop.run_in_executor(executor, _uncompress_frame, compress_type, words)
+        words = await _read_frame(reader)
+        yield await ints
+
+####
+# Compression parallèle
+# - Le tableau est découpé en blocs compressés indépendamment dans plusieurs processus
+# - Le conteneur produit contient le nombre de blocs, la table des positions
+#   (en mots) du début de chaque bloc et de la fin du dernier, puis les blocs
+# - Les entiers sont transmis aux processus par mémoire partagée, dans des tableaux 'I' :
+#   seuls les entiers positifs de 32 bits au plus sont acceptés ('wide' n'est pas supporté)
+####
+def parallel_compress(numbers: Sequence[int], compress_type: str = 'crossing',
+                      workers: Optional[int] = None, block_size: int = 1 << 16) -> List[int]:
+    if block_size <= 0:
+        raise ValueError("block_size must be positive")
+    if compress_type == 'wide':
+        raise ValueError("'wide' is not supported by parallel compression")
+    if not len(numbers):
+        raise ValueError("no array has been given, cannot compress")
+    try:
+        values = array('I', numbers)
+    except OverflowError:
+        raise ValueError("Integer is negative" if min(numbers) < 0 else "Integer is larger than 32 bits")
+
+    shared = _share_array(values)
+    try:
+        blocks = [(shared.name, start, min(start + block_size, len(values)), compress_type)
+                  for start in range(0, len(values), block_size)]
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            compressed_blocks = list(executor.map(_compress_block, *zip(*blocks)))
+    finally:
+        shared.close()
+        shared.unlink()
+
+    # Table des positions des blocs, puis les blocs les uns à la suite des autres
+    offsets: List[int] = [len(compressed_blocks) + 2]
+    container = array('I')
+    for block in compressed_blocks:
+        container.frombytes(block)
+        offsets.append(offsets[0] + len(container))
+    return [len(compressed_blocks)] + offsets + container.tolist()
+
+def parallel_uncompress(container: Sequence[int], compress_type: str = 'crossing',
+                        workers: Optional[int] = None) -> array:
+    if compress_type == 'wide':
+        raise ValueError("'wide' is not supported by parallel compression")
+    total_blocks = container[0]
+    offsets = container[1:(total_blocks + 2)]
+    # Le nombre d'entiers de chaque bloc est le premier mot de ses meta
+    item_offsets: List[int] = [0]
+    for offset in offsets[:-1]:
+        item_offsets.append(item_offsets[-1] + container[offset])
+
+    shared = _share_array(array('I', container))
+    output = shared_memory.SharedMemory(create=True, size=max(item_offsets[-1] * 4, 1))
+    try:
+        blocks = [(shared.name, output.name, offsets[k], offsets[k + 1], item_offsets[k], compress_type)
+                  for k in range(total_blocks)]
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(_uncompress_block, *zip(*blocks)))
+        ints = array('I')
+        ints.frombytes(output.buf[:(item_offsets[-1] * 4)])
+    finally:
+        for memory in (shared, output):
+            memory.close()
+            memory.unlink()
+    return ints
+
+# Copie d'un tableau d'entiers dans un segment de mémoire partagée
+def _share_array(values: array) -> shared_memory.SharedMemory:
+    shared = shared_memory.SharedMemory(create=True, size=max(len(values) * values.itemsize, 1))
+    shared.buf[:(len(values) * values.itemsize)] = values.tobytes()
+    return shared
+
+def _compress_block(name: str, start: int, stop: int, compress_type: str) -> bytes:
+    shared = shared_memory.SharedMemory(name=name)
+    try:
+        words = shared.buf.cast('I')
+        block: List[int] = words[start:stop].tolist()
+        words.release()
+    finally:
+        shared.close()
+    packer = bit_packer_factory(compress_type, block)
+    packer.compress()
+    return array('I', packer.compressed).tobytes()
+
+def _uncompress_block(name: str, output_name: str, start: int, stop: int, item_offset: int, compress_type: str) -> int:
+    shared = shared_memory.SharedMemory(name=name)
+    try:
+        words = shared.buf.cast('I')
+        block: List[int] = words[start:stop].tolist()
+        words.release()
+    finally:
+        shared.close()
+    ints = array('I', bit_packer_factory(compress_type, []).uncompress(block))
+    output = shared_memory.SharedMemory(name=output_name)
+    try:
+        output.buf[(item_offset * 4):((item_offset + len(ints)) * 4)] = ints.tobytes()
+    finally:
+        output.close()
+    return len(ints)
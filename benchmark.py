@@ -0,0 +1,201 @@
+from typing import Callable, List, Optional, Sequence
+from BitPacker import bit_packer_factory, parallel_compress, parallel_uncompress, timing_stats
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+#####
+# Distributions d'entiers utilisées pour les mesures
+# - uniform : entiers répartis uniformément sur 16 bits
+# - skewed : beaucoup de petits entiers et quelques grands (loi exponentielle)
+# - sorted : entiers triés, comme des identifiants ou des horodatages
+# - high_overflow : un entier sur cinq est bien plus grand que les autres
+#####
+def uniform(size: int) -> List[int]:
+    return [random.randint(0, (1 << 16) - 1) for _ in range(size)]
+
+def skewed(size: int) -> List[int]:
+    return [min(int(random.expovariate(1 / 50)), (1 << 30) - 1) for _ in range(size)]
+
+def sorted_ints(size: int) -> List[int]:
+    return sorted(random.randint(0, (1 << 30) - 1) for _ in range(size))
+
+def high_overflow(size: int) -> List[int]:
+    return [random.randint(0, 255) if random.random() < 0.8 else random.randint(1 << 20, (1 << 28) - 1)
+            for _ in range(size)]
+
+DISTRIBUTIONS: dict[str, Callable[[int], List[int]]] = {
+    'uniform': uniform,
+    'skewed': skewed,
+    'sorted': sorted_ints,
+    'high_overflow': high_overflow,
+}
+
+# Débit en entiers et en Mo (des entiers de 32 bits non compressés) par seconde
+def _throughput(size: int, seconds: float) -> dict[str, float]:
+    if seconds <= 0:
+        return {'values_per_second': 0.0, 'mb_per_second': 0.0}
+    return {'values_per_second': size / seconds, 'mb_per_second': (size * 4) / seconds / 1e6}
+
+# Pic de mémoire (en octets) alloué par action
+def _peak_memory(action: Callable[[], object]) -> int:
+    tracemalloc.start()
+    try:
+        action()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+# Mesures d'une méthode sur un tableau : repeat compressions et décompressions,
+# reads lectures avec get, puis une dernière passe sous tracemalloc pour la mémoire
+# (tracemalloc ralentit fortement l'exécution, il ne fausse donc pas les temps)
+def benchmark(compress_type: str, numbers: List[int], repeat: int = 5, reads: int = 1000) -> dict:
+    samples: dict[str, List[float]] = {}
+    compressed: List[int] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        packer = bit_packer_factory(compress_type, numbers)
+        packer.compress()
+        samples.setdefault('total_compression', []).append(time.perf_counter() - start)
+        compressed = packer.compressed
+
+        unpacker = bit_packer_factory(compress_type, [])
+        unpacker.uncompress(compressed)
+        for key in random.choices(range(len(numbers)), k=reads):
+            unpacker.get(key)
+        for packer_timings in (packer.timings, unpacker.timings):
+            for code, timings in packer_timings.items():
+                samples.setdefault(code, []).extend(timings)
+
+    peak_memory = {
+        'compression': _peak_memory(lambda: bit_packer_factory(compress_type, numbers).compress()),
+        'decompression': _peak_memory(lambda: bit_packer_factory(compress_type, []).uncompress(compressed)),
+    }
+    timings = {code: timing_stats(values) for code, values in samples.items()}
+    return {
+        'compress_type': compress_type,
+        'size': len(numbers),
+        'compressed_words': len(compressed),
+        'ratio': len(numbers) / len(compressed),
+        'timings': timings,
+        'throughput': {
+            'compression': _throughput(len(numbers), timings['total_compression']['median']),
+            'decompression': _throughput(len(numbers), timings['decompression']['median']),
+        },
+        'peak_memory': peak_memory,
+    }
+
+# Mesures de la compression et de la décompression parallèles avec workers processus,
+# le tableau étant découpé en blocs de block_size entiers
+def benchmark_parallel(compress_type: str, numbers: List[int], workers: int, repeat: int = 5,
+                       block_size: int = 1 << 16) -> dict:
+    samples: dict[str, List[float]] = {'compression': [], 'decompression': []}
+    container: List[int] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        container = parallel_compress(numbers, compress_type, workers, block_size)
+        samples['compression'].append(time.perf_counter() - start)
+        start = time.perf_counter()
+        parallel_uncompress(container, compress_type, workers)
+        samples['decompression'].append(time.perf_counter() - start)
+
+    timings = {code: timing_stats(values) for code, values in samples.items()}
+    return {
+        'workers': workers,
+        'blocks': container[0],
+        'timings': timings,
+        'throughput': {code: _throughput(len(numbers), stats['median']) for code, stats in timings.items()},
+    }
+
+# Mesures de chaque méthode sur chaque taille et chaque distribution, puis
+# en parallèle pour chaque nombre de processus de workers
+def run_benchmarks(sizes: List[int], distributions: List[str], compress_types: List[str],
+                   repeat: int = 5, reads: int = 1000, seed: Optional[int] = 0,
+                   workers: Sequence[int] = (), block_size: int = 1 << 16) -> dict:
+    random.seed(seed)
+    results = []
+    for distribution in distributions:
+        for size in sizes:
+            numbers = DISTRIBUTIONS[distribution](size)
+            for compress_type in compress_types:
+                result = benchmark(compress_type, numbers, repeat, reads)
+                result['distribution'] = distribution
+                result['parallel'] = [benchmark_parallel(compress_type, numbers, count, repeat, block_size)
+                                      for count in workers]
+                results.append(result)
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'repeat': repeat,
+        'reads': reads,
+        'seed': seed,
+        'workers': list(workers),
+        'block_size': block_size,
+        'results': results,
+    }
+
+# Comparaison avec des mesures précédentes : liste des régressions de plus de
+# tolerance (en proportion) sur la médiane de chaque étape et sur le ratio de compression
+def compare(previous: dict, current: dict, tolerance: float = 0.2) -> List[str]:
+    regressions: List[str] = []
+    previous_results = {(result['compress_type'], result['distribution'], result['size']): result
+                        for result in previous['results']}
+    for result in current['results']:
+        key = (result['compress_type'], result['distribution'], result['size'])
+        before = previous_results.get(key)
+        if before is None:
+            continue
+        name = ' '.join(str(part) for part in key)
+        if result['ratio'] < before['ratio'] * (1 - tolerance):
+            regressions.append(f"{name} ratio {before['ratio']:.3f} -> {result['ratio']:.3f}")
+        for code, stats in result['timings'].items():
+            if code in before['timings'] and stats['median'] > before['timings'][code]['median'] * (1 + tolerance):
+                regressions.append(f"{name} {code} median {before['timings'][code]['median']:.6f}s -> "
+                                   f"{stats['median']:.6f}s")
+        previous_parallel = {parallel['workers']: parallel for parallel in before.get('parallel', [])}
+        for parallel in result.get('parallel', []):
+            before_parallel = previous_parallel.get(parallel['workers'])
+            if before_parallel is None:
+                continue
+            for code, stats in parallel['timings'].items():
+                median = before_parallel['timings'][code]['median']
+                if stats['median'] > median * (1 + tolerance):
+                    regressions.append(f"{name} {parallel['workers']} workers {code} median {median:.6f}s -> "
+                                       f"{stats['median']:.6f}s")
+    return regressions
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='BitPacker benchmarks')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--distributions', nargs='+', choices=list(DISTRIBUTIONS), default=list(DISTRIBUTIONS))
+    parser.add_argument('--compress-types', nargs='+', default=['crossing', 'nocrossing'])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--reads', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, nargs='*', default=[],
+                        help='numbers of processes for the parallel compression and decompression')
+    parser.add_argument('--block-size', type=int, default=1 << 16)
+    parser.add_argument('--output', help='JSON file (standard output by default)')
+    parser.add_argument('--compare', help='JSON file of previous results')
+    parser.add_argument('--tolerance', type=float, default=0.2)
+    args = parser.parse_args()
+
+    report = run_benchmarks(args.sizes, args.distributions, args.compress_types, args.repeat, args.reads, args.seed,
+                            args.workers, args.block_size)
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+    if args.compare:
+        with open(args.compare) as file:
+            regressions = compare(json.load(file), report, args.tolerance)
+        for regression in regressions:
+            print('[regression] ', regression, file=sys.stderr)
+        sys.exit(1 if regressions else 0)
@@ -1,8 +1,23 @@
 from typing import List
-from BitPacker import bit_packer_factory
+from BitPacker import (bit_packer_factory, compress_stream, uncompress_stream, parallel_compress, parallel_uncompress,
+                       zigzag, unzigzag, calibrate, load_calibration, send_frames, receive_frames, transfer_time,
+                       BaseBitPacker, BitPackerAuto, BitReader, BitWriter, TRANSFORMS, ZONE_MAGIC)
+from benchmark import run_benchmarks, compare
+from itertools import chain
+import asyncio
+import json
+import math
+import os
 import random
+import tempfile
+import time
 import unittest
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 def generate_int_list() -> List[int]:
     return (
         [random.randint(0, 9999) for _ in range(4500)] +
@@ -26,7 +41,8 @@ class TestBitPacker(unittest.TestCase):
         self.assertEqual(packer.max, unpacker.max, 'Max does not match')
         self.assertEqual(array, ints, 'Uncompress failed as arrays are not the same')
         for i in range(0, 10):
-            random_key = random.randint(0, len(array))
+            # randint inclut la borne haute : la dernière position valide est len(array) - 1
+            random_key = random.randint(0, len(array) - 1)
             self.assertEqual(array[random_key], packer.get(random_key), 'Unable to retrieve correct number for key ' + str(random_key))
 
         for key in packer.benchmark.keys():
@@ -57,7 +73,8 @@ class TestBitPacker(unittest.TestCase):
         self.assertEqual(packer.max, unpacker.max, 'Max does not match')
         self.assertEqual(array, ints, 'Uncompress failed as arrays are not the same')
         for i in range(0, 10):
-            random_key = random.randint(0, len(array))
+            # randint inclut la borne haute : la dernière position valide est len(array) - 1
+            random_key = random.randint(0, len(array) - 1)
             self.assertEqual(array[random_key], packer.get(random_key), 'Unable to retrieve correct number for key ' + str(random_key))
 
         for key in packer.benchmark.keys():
@@ -74,5 +91,614 @@ class TestBitPacker(unittest.TestCase):
         else:
             print('[bench packer nocrossing] compression does not worth it')
 
+    def test_bit_writer_reader(self) -> None:
+        values: List[tuple] = [(random.randint(0, (1 << length) - 1), length) for length in
+                               [random.randint(1, 32) for _ in range(1000)]]
+        writer = BitWriter()
+        for value, length in values:
+            writer.write(value, length)
+        words: List[int] = writer.getvalue()
+        self.assertEqual(len(words), math.ceil(sum(length for _, length in values) / 32))
+        self.assertTrue(all(0 <= word < (1 << 32) for word in words), 'Words are not 32 bits integers')
+
+        reader = BitReader(words)
+        cursor = 0
+        for value, length in values:
+            self.assertEqual(value, reader.read(cursor, length), 'Unable to read value at ' + str(cursor))
+            cursor += length
+        # Les bits au-delà du dernier mot ne sont jamais lus comme des "0"
+        self.assertRaises(IndexError, reader.read, len(words) * 32 - 4, 8)
+        self.assertRaises(IndexError, BitReader([1 << 31, 0]).find_one, 1)
+        self.assertEqual(32, BitReader([0, 1 << 31]).find_one(0))
+        # Un packer qui n'a rien compressé ne retourne pas de "0"
+        packer = bit_packer_factory('crossing', [1, 2, 3])
+        self.assertRaises(IndexError, packer.get, 2)
+        self.assertRaises(IndexError, packer.sum)
+
+    def test_best_bit_length(self) -> None:
+        array: List[int] = [random.randint(0, 255) for _ in range(300)] + [random.randint(0, 1 << 20) for _ in range(20)]
+        for compress_type in ['crossing', 'nocrossing']:
+            packer = bit_packer_factory(compress_type, array)
+            packer.compress()
+            # Aucun autre nombre de bits ne doit donner un tableau compressé plus petit
+            for bit_length in range(1, packer.max + 1):
+                other = bit_packer_factory(compress_type, array)
+                other.best_bit_length = bit_length
+                other.dictionary = False
+                if len(other._get_overflow_list()) > (1 << bit_length):
+                    continue
+                other.compress()
+                self.assertGreaterEqual(len(other.compressed), len(packer.compressed),
+                                        compress_type + ' best bit length is not optimal')
+
+    def test_bit_packer_no_crossing_index(self) -> None:
+        array: List[int] = generate_int_list()
+        packer = bit_packer_factory('nocrossing', array)
+        packer.index_step = 16
+        packer.compress(embed_index=True)
+        self.assertEqual(array, [packer.get(i) for i in range(len(array))], 'Unable to retrieve numbers with index')
+
+        # L'index est relu depuis le tableau compressé
+        unpacker = bit_packer_factory('nocrossing', [])
+        self.assertEqual(array, unpacker.uncompress(packer.compressed))
+        self.assertEqual(16, unpacker.index_step)
+        self.assertEqual(packer.index, unpacker.index)
+        self.assertEqual(packer.overflow_index, unpacker.overflow_index)
+        for i in range(0, 10):
+            random_key = random.randint(0, len(array) - 1)
+            self.assertEqual(array[random_key], unpacker.get(random_key), 'Unable to retrieve correct number for key ' + str(random_key))
+        with self.assertRaises(IndexError):
+            unpacker.get(len(array))
+
+    def test_bit_packer_no_crossing_high_overflow(self) -> None:
+        # 30% d'overflow distincts : la liste des overflow est lue une seule fois
+        array: List[int] = (
+            [random.randint(0, 255) for _ in range(7000)] +
+            random.sample(range(1 << 20, 1 << 29), 3000)
+        )
+        random.shuffle(array)
+        packer = bit_packer_factory('nocrossing', array)
+        packer.compress()
+        self.assertGreater(packer.total_overflow, 1000)
+
+        unpacker = bit_packer_factory('nocrossing', [])
+        ints: List[int] = unpacker.uncompress(packer.compressed)
+        self.assertEqual(array, ints, 'Uncompress failed as arrays are not the same')
+
+        for key in unpacker.benchmark.keys():
+            print('[bench unpacker nocrossing high overflow] ', key, ' took ', unpacker.benchmark[key], 'seconds')
+
+    def test_get_many_and_slice(self) -> None:
+        array: List[int] = generate_int_list()
+        indices: List[int] = [random.randint(0, len(array) - 1) for _ in range(500)]
+        for compress_type in ['crossing', 'nocrossing']:
+            packer = bit_packer_factory(compress_type, array)
+            packer.compress()
+            self.assertEqual([array[i] for i in indices], packer.get_many(indices).tolist(),
+                             compress_type + ' get_many failed')
+            self.assertEqual(array[1234:5678], packer.slice(1234, 5678).tolist(), compress_type + ' slice failed')
+            self.assertEqual(array[-10:], packer.slice(-10, len(array)).tolist(), compress_type + ' slice failed')
+            self.assertEqual([], packer.slice(10, 5).tolist())
+            with self.assertRaises(IndexError):
+                packer.get_many([0, len(array)])
+
+    def test_bit_packer_blocked(self) -> None:
+        # Longues suites de petits entiers avec quelques pics de grands entiers
+        array: List[int] = []
+        for _ in range(100):
+            if random.random() < 0.1:
+                array += [random.randint(0, 1 << 28) for _ in range(random.randint(5, 60))]
+            else:
+                array += [random.randint(0, 15) for _ in range(random.randint(50, 300))]
+        packer = bit_packer_factory('blocked', array)
+        packer.compress()
+        crossing = bit_packer_factory('crossing', array)
+        crossing.compress()
+        self.assertLess(len(packer.compressed), len(crossing.compressed), 'Blocked compression is not smaller')
+
+        unpacker = bit_packer_factory('blocked', [])
+        self.assertEqual(array, unpacker.uncompress(packer.compressed), 'Uncompress failed as arrays are not the same')
+        self.assertEqual(128, unpacker.block_size)
+        for i in range(0, 10):
+            random_key = random.randint(0, len(array) - 1)
+            self.assertEqual(array[random_key], unpacker.get(random_key), 'Unable to retrieve correct number for key ' + str(random_key))
+        self.assertEqual(array[100:1000], unpacker.slice(100, 1000).tolist())
+
+        for key in unpacker.benchmark.keys():
+            print('[bench unpacker blocked] ', key, ' took ', unpacker.benchmark[key], 'seconds')
+
+    def test_bit_packer_blocked_updates(self) -> None:
+        array: List[int] = generate_int_list()
+        packer = bit_packer_factory('blocked', array)
+        packer.compress()
+        unpacker = bit_packer_factory('blocked', [])
+        unpacker.uncompress(packer.compressed)
+        unpacker.enable_cache(max_entries=8)
+        numbers: List[int] = list(array)
+
+        unpacker.extend(range(1000))
+        numbers.extend(range(1000))
+        unpacker.append(1 << 30)
+        numbers.append(1 << 30)
+        for i in range(0, 2000):
+            random_key = random.randint(0, len(numbers) - 1)
+            # Entiers qui tiennent sur le nombre de bits du bloc, overflow existants ou nouveaux
+            number = random.choice([random.randint(0, 15), numbers[random.randint(0, len(numbers) - 1)],
+                                    random.randint(0, 1 << 31)])
+            unpacker.set(random_key, number)
+            numbers[random_key] = number
+            self.assertEqual(number, unpacker.get(random_key))
+        self.assertEqual(numbers, unpacker.slice(0, None).tolist())
+        self.assertEqual(sum(1 for number in numbers if 100 <= number <= 5000), unpacker.count_in_range(100, 5000))
+        # Les overflow ajoutés n'agrandissent pas un bloc au-delà du seuil de compaction
+        for words, encoded_length in zip(unpacker.blocks, unpacker.encoded_lengths):
+            self.assertLessEqual(len(words), encoded_length * (1 + unpacker.compaction_threshold))
+        self.assertEqual(numbers, bit_packer_factory('blocked', []).uncompress(unpacker.compressed))
+        unpacker.compact()
+        self.assertEqual(numbers, bit_packer_factory('blocked', []).uncompress(unpacker.compressed))
+        with self.assertRaises(IndexError):
+            unpacker.set(len(numbers), 1)
+        with self.assertRaises(ValueError):
+            unpacker.append(-1)
+
+        # Tableau construit uniquement par ajouts
+        packer = bit_packer_factory('blocked', [])
+        for number in array:
+            packer.append(number)
+        self.assertEqual(array, bit_packer_factory('blocked', []).uncompress(packer.compressed))
+        for key in packer.benchmark.keys():
+            print('[bench packer blocked updates] ', key, ' took ', packer.benchmark[key], 'seconds')
+
+    def test_bit_packer_crossing_updates(self) -> None:
+        array: List[int] = generate_int_list()
+        for zone_map in [False, True]:
+            packer = bit_packer_factory('crossing', array)
+            packer.compress(zone_map=zone_map)
+            unpacker = bit_packer_factory('crossing', [])
+            unpacker.uncompress(packer.compressed)
+            unpacker.enable_cache(max_entries=8)
+            numbers: List[int] = list(array)
+            for i in range(0, 2000):
+                random_key = random.randint(0, len(numbers) - 1)
+                # Entiers qui tiennent sur le nombre de bits idéal, overflow existants ou nouveaux
+                number = random.choice([random.randint(0, 15), numbers[random.randint(0, len(numbers) - 1)],
+                                        random.randint(0, 1 << 31)])
+                try:
+                    unpacker.set(random_key, number)
+                except ValueError:
+                    # Un nouvel overflow ne peut pas être ajouté après les zones, ni au-delà des positions possibles
+                    self.assertTrue(zone_map or number.bit_length() > unpacker.max or
+                                    unpacker.total_overflow >= 1 << unpacker.best_bit_length)
+                    continue
+                numbers[random_key] = number
+                self.assertEqual(number, unpacker.get(random_key))
+            self.assertEqual(numbers, unpacker.slice(0, None).tolist())
+            # Les mots modifiés (liste des overflow et zones comprises) se décompressent comme les autres
+            decoded = bit_packer_factory('crossing', [])
+            self.assertEqual(numbers, decoded.uncompress(unpacker.compressed))
+            self.assertEqual(sum(numbers), decoded.sum())
+            self.assertEqual(sum(1 for number in numbers if 100 <= number <= 5000), decoded.count_in_range(100, 5000))
+            with self.assertRaises(IndexError):
+                unpacker.set(len(numbers), 1)
+            with self.assertRaises(ValueError):
+                unpacker.set(0, -1)
+
+        # Les autres méthodes renvoient vers 'blocked'
+        packer = bit_packer_factory('nocrossing', array)
+        packer.compress()
+        with self.assertRaisesRegex(ValueError, 'blocked'):
+            packer.set(0, 1)
+        with self.assertRaisesRegex(ValueError, 'blocked'):
+            packer.append(1)
+
+    def test_bit_packer_dictionary(self) -> None:
+        statuses: List[int] = [200, 201, 204, 301, 302, 304, 400, 401, 403, 404, 500, 502, 503]
+        array: List[int] = [random.choice(statuses) for _ in range(10000)]
+        packer = bit_packer_factory('dictionary', array)
+        packer.compress()
+        self.assertEqual(4, packer.best_bit_length)
+        unpacker = bit_packer_factory('dictionary', [])
+        self.assertEqual(array, unpacker.uncompress(packer.compressed), 'Uncompress failed as arrays are not the same')
+
+        packer = bit_packer_factory('crossing', array)
+        packer.compress()
+        self.assertTrue(packer.dictionary, 'crossing did not choose the dictionary')
+        # Le même tableau compressé sans dictionnaire doit être plus grand
+        other = bit_packer_factory('crossing', array)
+        other._find_best_bit_length()
+        other.dictionary = False
+        other.compress()
+        self.assertLess(len(packer.compressed), len(other.compressed))
+        # Les codes couperaient les mots : nocrossing garde son format, sans croisement de mots
+        nocrossing = bit_packer_factory('nocrossing', array)
+        nocrossing.compress()
+        self.assertFalse(nocrossing.dictionary, 'nocrossing chose the dictionary')
+
+        # Les tableaux nocrossing par dictionnaire déjà écrits (même format que crossing) se lisent toujours
+        for compress_type in ['crossing', 'nocrossing']:
+            unpacker = bit_packer_factory(compress_type, [])
+            self.assertEqual(array, unpacker.uncompress(packer.compressed), compress_type + ' uncompress failed')
+            for i in range(0, 10):
+                random_key = random.randint(0, len(array) - 1)
+                self.assertEqual(array[random_key], unpacker.get(random_key), 'Unable to retrieve correct number for key ' + str(random_key))
+            self.assertEqual(array[100:200], unpacker.get_many(range(100, 200)).tolist())
+
+    def test_bit_packer_wide(self) -> None:
+        array: List[int] = [random.randint(0, 1000) for _ in range(5000)]
+        array[1234] = 1 << 40
+        array[4321] = (1 << 64) - 1
+        signed: List[int] = [random.randint(-1000, 1000) for _ in range(5000)] + [-(1 << 63), (1 << 63) - 1]
+        for numbers in [array, signed]:
+            packer = bit_packer_factory('wide', numbers)
+            packer.compress()
+            # Les petits entiers restent écrits sur le nombre de bits idéal
+            self.assertLessEqual(packer.best_bit_length, 11)
+            self.assertLess(len(packer.compressed), len(numbers) // 2)
+            unpacker = bit_packer_factory('wide', [])
+            self.assertEqual(numbers, unpacker.uncompress(packer.compressed), 'Uncompress failed as arrays are not the same')
+            for i in range(0, 10):
+                random_key = random.randint(0, len(numbers) - 1)
+                self.assertEqual(numbers[random_key], unpacker.get(random_key), 'Unable to retrieve correct number for key ' + str(random_key))
+            self.assertEqual(numbers[1200:1300], unpacker.slice(1200, 1300).tolist())
+            self.assertEqual(numbers[-2:], unpacker.get_many([len(numbers) - 2, len(numbers) - 1]).tolist())
+
+        # Les autres méthodes refusent les entiers qu'elles ne peuvent pas écrire
+        for compress_type in ['crossing', 'nocrossing']:
+            with self.assertRaises(ValueError):
+                bit_packer_factory(compress_type, signed).compress()
+            with self.assertRaises(ValueError):
+                bit_packer_factory(compress_type, array).compress()
+
+    def test_benchmark(self) -> None:
+        array: List[int] = generate_int_list()
+        unpacker = bit_packer_factory('nocrossing', [])
+        packer = bit_packer_factory('nocrossing', array)
+        packer.compress()
+        unpacker.uncompress(packer.compressed)
+        for i in range(0, 20):
+            unpacker.get(random.randint(0, len(array) - 1))
+        # Chaque get est conservé, et non plus seulement le dernier
+        stats = unpacker.timing_stats()['reading_int']
+        self.assertEqual(20, stats['count'])
+        self.assertLessEqual(stats['min'], stats['median'])
+        self.assertLessEqual(stats['median'], stats['p99'])
+
+        # (nocrossing ne compresse pas des entiers uniformes de 16 bits : un seul slot de 18 bits par mot)
+        report = run_benchmarks([2000], ['skewed', 'high_overflow'], ['crossing', 'nocrossing'], repeat=2, reads=50)
+        report = json.loads(json.dumps(report))
+        self.assertEqual(4, len(report['results']))
+        for result in report['results']:
+            self.assertEqual(100, result['timings']['reading_int']['count'])
+            self.assertGreater(result['ratio'], 1)
+            self.assertGreater(result['throughput']['decompression']['values_per_second'], 0)
+            self.assertGreater(result['peak_memory']['compression'], 0)
+        self.assertEqual([], compare(report, report))
+        slower = json.loads(json.dumps(report))
+        slower['results'][0]['timings']['compression']['median'] *= 2
+        self.assertEqual(1, len(compare(report, slower)))
+
+        # Mesures de la version parallèle pour chaque nombre de processus
+        report = run_benchmarks([2000], ['uniform'], ['crossing'], repeat=2, reads=10, workers=[1, 2], block_size=500)
+        report = json.loads(json.dumps(report))
+        parallel = report['results'][0]['parallel']
+        self.assertEqual([1, 2], [result['workers'] for result in parallel])
+        for result in parallel:
+            self.assertEqual(4, result['blocks'])
+            self.assertEqual(2, result['timings']['decompression']['count'])
+            self.assertGreater(result['throughput']['compression']['values_per_second'], 0)
+        self.assertEqual([], compare(report, report))
+        slower = json.loads(json.dumps(report))
+        slower['results'][0]['parallel'][1]['timings']['decompression']['median'] *= 2
+        self.assertEqual(1, len(compare(report, slower)))
+
+    def test_bit_packer_auto(self) -> None:
+        array: List[int] = generate_int_list()
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'calibration.json')
+            speeds = calibrate(path, size=2000)
+            self.assertEqual(['crossing', 'nocrossing', 'raw'], sorted(speeds))
+            # La calibration enregistrée est réutilisée sans nouvelle mesure
+            self.assertEqual(speeds, load_calibration(path))
+
+        # Réseau lent : le tableau le plus petit l'emporte
+        speeds = {compress_type: {'compression': 1e6, 'decompression': 1e6}
+                  for compress_type in ['crossing', 'nocrossing', 'raw']}
+        packer = BitPackerAuto(array, bandwidth=1e4, latency=0.001, speeds=speeds)
+        self.assertEqual('crossing', packer.selected_compress_type)
+        estimated = packer.estimates['crossing']['words']
+        packer.compress()
+        self.assertLess(abs(estimated - len(packer.compressed)) / len(packer.compressed), 0.1)
+        # Réseau rapide et compression lente : le tableau est envoyé sans compression
+        speeds['raw'] = {'compression': 1e9, 'decompression': 1e9}
+        raw_packer = BitPackerAuto(array, bandwidth=1e9, latency=0.001, speeds=speeds)
+        self.assertEqual('raw', raw_packer.selected_compress_type)
+        raw_packer.compress()
+
+        # Un entier de plus de 30 bits en dehors de l'échantillon écarte nocrossing
+        speeds['nocrossing'] = {'compression': 1e9, 'decompression': 1e9}
+        large = [random.randint(0, 255) for _ in range(20001)]
+        large[1] = 1 << 30
+        large_packer = BitPackerAuto(large, bandwidth=1e4, latency=0.001, speeds=speeds)
+        self.assertNotIn('nocrossing', large_packer.estimates)
+        large_packer.compress()
+        self.assertEqual(large, bit_packer_factory('auto', []).uncompress(large_packer.compressed))
+        self.assertRaises(ValueError, BitPackerAuto, [1, -2] * 5000, speeds=speeds)
+
+        for compressed in [packer.compressed, raw_packer.compressed]:
+            unpacker = bit_packer_factory('auto', [])
+            self.assertEqual(array, unpacker.uncompress(compressed), 'Uncompress failed as arrays are not the same')
+            for i in range(0, 10):
+                random_key = random.randint(0, len(array) - 1)
+                self.assertEqual(array[random_key], unpacker.get(random_key), 'Unable to retrieve correct number for key ' + str(random_key))
+            self.assertEqual(array[100:200], unpacker.slice(100, 200).tolist())
+            self.assertEqual([array[5], array[3]], unpacker.get_many([5, 3]).tolist())
+
+    def test_cache(self) -> None:
+        array: List[int] = generate_int_list()
+        for compress_type in ['crossing', 'nocrossing', 'blocked']:
+            packer = bit_packer_factory(compress_type, array)
+            packer.compress()
+            unpacker = bit_packer_factory(compress_type, [])
+            unpacker.uncompress(packer.compressed)
+            unpacker.enable_cache(max_entries=4)
+            # Lectures concentrées sur quelques blocs
+            for i in range(0, 2000):
+                random_key = min(int(random.expovariate(1 / 300)), len(array) - 1)
+                self.assertEqual(array[random_key], unpacker.get(random_key), 'Unable to retrieve correct number for key ' + str(random_key))
+            self.assertLessEqual(len(unpacker.cache), 4)
+            self.assertGreater(unpacker.cache_stats['hits'], unpacker.cache_stats['misses'], compress_type)
+            self.assertGreater(unpacker.cache_stats['evictions'], 0, compress_type)
+            self.assertEqual(2000, unpacker.cache_stats['hits'] + unpacker.cache_stats['misses'])
+
+            # Le cache est vidé lorsque le tableau compressé est remplacé
+            other: List[int] = [number + 1 for number in array]
+            packer = bit_packer_factory(compress_type, other)
+            packer.compress()
+            unpacker.uncompress(packer.compressed)
+            self.assertEqual(0, len(unpacker.cache))
+            self.assertEqual(other[10], unpacker.get(10))
+
+        unpacker = bit_packer_factory('crossing', array)
+        unpacker.compress()
+        unpacker.enable_cache(max_entries=None, max_bytes=2048)
+        for i in range(0, len(array), 97):
+            self.assertEqual(array[i], unpacker.get(i))
+            self.assertLessEqual(unpacker.cache_bytes, 2048)
+
+    def test_queries(self) -> None:
+        array: List[int] = sorted(generate_int_list()) + [7] * 300 + [random.randint(0, 1 << 28) for _ in range(50)]
+        for compress_type in ['crossing', 'nocrossing', 'blocked']:
+            for zone_map in [False, True]:
+                packer = bit_packer_factory(compress_type, array)
+                if zone_map and compress_type != 'blocked':
+                    packer.compress(zone_map=True)
+                else:
+                    packer.compress()
+                unpacker = bit_packer_factory(compress_type, [])
+                self.assertEqual(array, unpacker.uncompress(packer.compressed), compress_type + ' uncompress failed')
+                self.assertEqual(sum(array), unpacker.sum())
+                self.assertEqual(min(array), unpacker.min_value())
+                self.assertEqual(max(array), unpacker.max_value())
+                for low, high in [(0, 500), (20000, 30000), (7, 7), (1 << 20, 1 << 28), (-10, -1)]:
+                    positions = [i for i, number in enumerate(array) if low <= number <= high]
+                    self.assertEqual(len(positions), unpacker.count_in_range(low, high), compress_type + ' count_in_range')
+                    self.assertEqual(positions, unpacker.filter_range(low, high).tolist(), compress_type + ' filter_range')
+                for number in [array[0], array[5000], array[-1], 1 << 30]:
+                    self.assertEqual(array.index(number) if number in array else -1, unpacker.find(number))
+                # Les zones écrites lors de la compression évitent de décoder tout le tableau
+                self.assertEqual(not zone_map or compress_type == 'blocked', 'zone_map' in unpacker.benchmark)
+
+        # Des entiers égaux au mot de contrôle ne sont pas pris pour des zones : seules les meta les signalent
+        for compress_type, size in [('crossing', 21), ('blocked', 130)]:
+            packer = bit_packer_factory(compress_type, [ZONE_MAGIC] * size)
+            packer.compress()
+            unpacker = bit_packer_factory(compress_type, [])
+            unpacker.uncompress(packer.compressed)
+            self.assertEqual(ZONE_MAGIC * size, unpacker.sum(), compress_type + ' sum')
+            self.assertEqual(size, unpacker.count_in_range(ZONE_MAGIC, ZONE_MAGIC), compress_type + ' count_in_range')
+
+        # Zones suivies de l'index, puis zones corrompues
+        packer = bit_packer_factory('nocrossing', array)
+        packer.compress(embed_index=True, zone_map=True)
+        unpacker = bit_packer_factory('nocrossing', [])
+        self.assertEqual(array, unpacker.uncompress(packer.compressed))
+        self.assertTrue(unpacker.zone_map)
+        self.assertEqual(sum(array), unpacker.sum())
+        self.assertNotIn('zone_map', unpacker.benchmark)
+        corrupted = list(packer.compressed)
+        corrupted[unpacker._payload_length()] = 0
+        unpacker.uncompress(corrupted)
+        self.assertRaises(ValueError, unpacker.sum)
+
+    def test_bit_packer_transform(self) -> None:
+        timestamps: List[int] = [1700000000]
+        for _ in range(20000):
+            timestamps.append(timestamps[-1] + random.randint(0, 20))
+        self.assertEqual([0, -1, 1, -2, 2], [unzigzag(zigzag(n)) for n in [0, -1, 1, -2, 2]])
+        self.assertEqual([0, 1, 2, 3, 4], [zigzag(n) for n in [0, -1, 1, -2, 2]])
+
+        for compress_type in ['crossing', 'nocrossing']:
+            for transform in TRANSFORMS:
+                packer = bit_packer_factory(compress_type, timestamps, transform=transform)
+                packer.compress()
+                unpacker = bit_packer_factory(compress_type, [], transform=transform)
+                self.assertEqual(timestamps, unpacker.uncompress(packer.compressed),
+                                 compress_type + ' ' + transform + ' uncompress failed')
+                for i in range(0, 10):
+                    random_key = random.randint(0, len(timestamps) - 1)
+                    self.assertEqual(timestamps[random_key], unpacker.get(random_key),
+                                     'Unable to retrieve correct number for key ' + str(random_key))
+                self.assertEqual(timestamps[1000:1300], unpacker.slice(1000, 1300).tolist())
+                # Les entiers bruts prennent 32 bits, les deltas seulement quelques bits
+                ratio = 1 if transform == 'for' else 3
+                self.assertLess(len(packer.compressed) * ratio, len(timestamps), compress_type + ' ' + transform)
+                # La méthode et la transformation sont lues dans les meta : elles doivent correspondre
+                other_type = 'nocrossing' if compress_type == 'crossing' else 'crossing'
+                self.assertRaises(ValueError, bit_packer_factory(other_type, [], transform=transform).uncompress,
+                                  packer.compressed)
+                other_transform = 'for' if transform != 'for' else 'delta'
+                self.assertRaises(ValueError, bit_packer_factory(compress_type, [], transform=other_transform).uncompress,
+                                  packer.compressed)
+                self.assertEqual(timestamps, bit_packer_factory('transform', []).uncompress(packer.compressed))
+                with tempfile.TemporaryDirectory() as directory:
+                    path = os.path.join(directory, 'array.bpk')
+                    packer.save(path)
+                    mapped = BaseBitPacker.open(path)
+                    self.assertEqual((compress_type, transform), (mapped.inner_compress_type, mapped.transform))
+                    self.assertEqual(timestamps[5000:5100], mapped.slice(5000, 5100).tolist())
+                    mapped.close()
+
+    def test_stream(self) -> None:
+        def sensor():
+            for _ in range(10500):
+                yield random.randint(0, 9999)
+
+        for compress_type in ['crossing', 'nocrossing']:
+            numbers = list(sensor())
+            frames = list(compress_stream(iter(numbers), compress_type, block_size=1000))
+            self.assertEqual(11, len(frames))
+            for frame in frames:
+                self.assertEqual(frame[0], len(frame) - 1, 'Frame length does not match')
+            ints = list(uncompress_stream(chain.from_iterable(frames), compress_type))
+            self.assertEqual(numbers, ints, compress_type + ' stream uncompress failed')
+        with self.assertRaises(ValueError):
+            list(uncompress_stream(frames[0][:-1]))
+
+    def test_send_and_receive_frames(self) -> None:
+        array: List[int] = generate_int_list() * 3
+
+        async def transfer(compress_type: str) -> List[int]:
+            received: List[int] = []
+
+            async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+                async for ints in receive_frames(reader, compress_type):
+                    received.extend(ints)
+                writer.close()
+
+            server = await asyncio.start_server(handle, '127.0.0.1', 0)
+            port = server.sockets[0].getsockname()[1]
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            frames = await send_frames(writer, iter(array), compress_type, block_size=4000)
+            self.assertEqual(math.ceil(len(array) / 4000), frames)
+            await reader.read()
+            writer.close()
+            server.close()
+            await server.wait_closed()
+            return received
+
+        for compress_type in ['crossing', 'nocrossing']:
+            self.assertEqual(array, asyncio.run(transfer(compress_type)), compress_type + ' transfer failed')
+
+        async def truncated() -> None:
+            reader = asyncio.StreamReader()
+            reader.feed_data(b'\x05\x00\x00\x00\x01\x00')
+            reader.feed_eof()
+            async for _ in receive_frames(reader):
+                pass
+
+        with self.assertRaises(ValueError):
+            asyncio.run(truncated())
+
+        # Les étapes se recouvrent : le temps total tend vers celui de l'étape la plus lente
+        sequential = transfer_time(2.0, 4e6, 1.0, 1e6, 0.01)
+        self.assertAlmostEqual(0.01 + 2.0 + 4.0 + 1.0, sequential)
+        self.assertAlmostEqual(0.01 + (7.0 / 100) + (99 * 4.0 / 100), transfer_time(2.0, 4e6, 1.0, 1e6, 0.01, 100))
+
+    def test_save_and_open(self) -> None:
+        array: List[int] = generate_int_list()
+        for compress_type in ['crossing', 'nocrossing', 'blocked', 'wide', 'raw']:
+            packer = bit_packer_factory(compress_type, array)
+            packer.compress()
+            with tempfile.TemporaryDirectory() as directory:
+                path = os.path.join(directory, 'array.bpk')
+                packer.save(path)
+
+                mapped = BaseBitPacker.open(path)
+                self.assertEqual(compress_type, mapped.compress_type)
+                self.assertEqual(packer.total_items, mapped.total_items)
+                self.assertEqual(array, mapped.slice(0, None).tolist(), compress_type + ' full decode failed')
+                for i in range(0, 10):
+                    random_key = random.randint(0, len(array) - 1)
+                    self.assertEqual(array[random_key], mapped.get(random_key), 'Unable to retrieve correct number for key ' + str(random_key))
+                self.assertEqual(array[100:200], mapped.get_many(range(100, 200)).tolist())
+                mapped.close()
+                with self.assertRaises(IndexError):
+                    mapped.get(0)
+
+                # Un fichier tronqué ou vide n'est pas ouvert
+                with open(path, 'rb') as file:
+                    content = file.read()
+                for length in [len(content) // 2, len(content) - 1, 0]:
+                    with open(path, 'wb') as file:
+                        file.write(content[:length])
+                    with self.assertRaises(ValueError):
+                        BaseBitPacker.open(path)
+
+    def test_parallel(self) -> None:
+        array: List[int] = generate_int_list() * 20
+        for compress_type in ['crossing', 'nocrossing']:
+            for workers in [1, 2, 4]:
+                start = time.perf_counter()
+                container: List[int] = parallel_compress(array, compress_type, workers, block_size=20000)
+                compression_time = time.perf_counter() - start
+                start = time.perf_counter()
+                ints = parallel_uncompress(container, compress_type, workers)
+                decompression_time = time.perf_counter() - start
+                self.assertEqual(array, ints.tolist(), compress_type + ' parallel uncompress failed')
+                print('[bench parallel ' + compress_type + '] ', workers, ' workers compression ',
+                      f"{len(array) / compression_time:.0f}", ' values/s, decompression ',
+                      f"{len(array) / decompression_time:.0f}", ' values/s')
+
+        for numbers, message in [([1, -2, 3], 'Integer is negative'), ([1, 1 << 32], 'Integer is larger than 32 bits')]:
+            with self.assertRaisesRegex(ValueError, message):
+                parallel_compress(numbers)
+        self.assertRaises(ValueError, parallel_compress, [1, 2, 3], 'wide')
+        self.assertRaises(ValueError, parallel_uncompress, [0, 2], 'wide')
+
+    @unittest.skipIf(np is None, 'NumPy is not installed')
+    def test_bit_packer_crossing_numpy(self) -> None:
+        array = np.array(generate_int_list(), dtype=np.uint32)
+        packer = bit_packer_factory('crossing', array, backend='numpy')
+        packer.compress()
+        reference = bit_packer_factory('crossing', array.tolist())
+        reference.compress()
+        self.assertEqual(reference.compressed, packer.compressed.tolist(), 'NumPy backend output differs')
+
+        unpacker = bit_packer_factory('crossing', [], backend='numpy')
+        ints = unpacker.uncompress(packer.compressed)
+        self.assertEqual(np.uint32, ints.dtype)
+        self.assertTrue(np.array_equal(array, ints), 'Uncompress failed as arrays are not the same')
+        indices = np.random.randint(0, len(array), size=500)
+        self.assertTrue(np.array_equal(array[indices], unpacker.get_many(indices)), 'get_many failed')
+        self.assertTrue(np.array_equal(array[1234:5678], unpacker.slice(1234, 5678)), 'slice failed')
+
+        # Les zones sont écrites comme avec la version Python
+        packer = bit_packer_factory('crossing', array, backend='numpy')
+        packer.compress(zone_map=True)
+        reference = bit_packer_factory('crossing', array.tolist())
+        reference.compress(zone_map=True)
+        self.assertEqual(reference.compressed, packer.compressed.tolist(), 'NumPy backend zone map differs')
+        unpacker = bit_packer_factory('crossing', [], backend='numpy')
+        self.assertTrue(np.array_equal(array, unpacker.uncompress(packer.compressed)))
+        self.assertEqual(int(array.sum()), unpacker.sum())
+        self.assertEqual(int(np.count_nonzero((array >= 100) & (array <= 5000))), unpacker.count_in_range(100, 5000))
+        self.assertNotIn('zone_map', unpacker.benchmark)
+
+        # Le tableau NumPy (uint32) produit par le backend se décode aussi avec les versions Python
+        for compress_type in ['crossing', 'nocrossing', 'blocked']:
+            python_packer = bit_packer_factory(compress_type, array.tolist())
+            python_packer.compress()
+            compressed = packer.compressed if compress_type == 'crossing' else np.array(python_packer.compressed, dtype=np.uint32)
+            python_unpacker = bit_packer_factory(compress_type, [])
+            self.assertEqual(array.tolist(), python_unpacker.uncompress(compressed),
+                             'Uncompress of a NumPy array failed for ' + compress_type)
+            self.assertEqual(int(array[-1]), python_unpacker.get(len(array) - 1), 'get failed for ' + compress_type)
+
+        for key in packer.benchmark.keys():
+            print('[bench packer crossing numpy] ', key, ' took ', packer.benchmark[key], 'seconds')
+
+        for key in unpacker.benchmark.keys():
+            print('[bench unpacker crossing numpy] ', key, ' took ', unpacker.benchmark[key], 'seconds')
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file